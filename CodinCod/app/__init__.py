@@ -4,8 +4,13 @@ from typing import Final
 from sanic import Sanic
 from sanic.application.constants import ServerStage
 
+from ..environment_variables import load_dotenv
+
+environment: Final = load_dotenv()
+
 app: Final = Sanic("CodinCod", log_config={"version": 1})
-app.config.WEBSOCKET_MAX_SIZE = 128
+app.config.WEBSOCKET_MAX_SIZE = int(environment.get("WEBSOCKET_MAX_SIZE") or 64 * 1024)
+# the session heartbeat pings idle clients instead, from a single timer
 app.config.WEBSOCKET_PING_INTERVAL = None  # type: ignore
 app.config.WEBSOCKET_PING_TIMEOUT = None  # type: ignore
 app.config.FALLBACK_ERROR_FORMAT = "json"
@@ -15,15 +20,59 @@ from .puzzle import puzzle_blueprint
 from .user import user_blueprint
 from .app_ws import ws_blueprint
 from .ide import ide_blueprint
+from .metrics import metrics_blueprint
+# registers the handlers on import, CodinCodException carries its own status code
+from . import exception_handler
+
+from ..piston import executor, Language
+from ..database import create_indexes
+from ..user import password_hasher
+from ..timer import timer
+from ..session import heartbeat
+from ..game_room import GameRoom
+from ..chat import chat_writer
 
 app.blueprint([
     game_room_blueprint,
     puzzle_blueprint,
     user_blueprint,
     ws_blueprint,
-    ide_blueprint
+    ide_blueprint,
+    metrics_blueprint
 ])
 
+@app.before_server_start
+async def start_executor(app: Sanic, loop):
+    executor.start()
+    await Language.load_catalog()
+    Language.start_refresh()
+
+@app.before_server_start
+async def setup_database(app: Sanic, loop):
+    await create_indexes()
+
+@app.before_server_start
+async def start_game_rooms(app: Sanic, loop):
+    timer.start()
+    heartbeat.start()
+    await GameRoom.restore_active()
+
+@app.after_server_stop
+async def close_executor(app: Sanic, loop):
+    await Language.stop_refresh()
+    await executor.close()
+
+@app.after_server_stop
+async def stop_timer(app: Sanic, loop):
+    heartbeat.stop()
+    # pending chat messages would be lost with the timer
+    await chat_writer.flush()
+    await timer.close()
+
+@app.after_server_stop
+async def close_password_hasher(app: Sanic, loop):
+    password_hasher.close()
+
 def app_start():
     if app.state.stage is not ServerStage.STOPPED:
         raise Exception("App is already running!")
@@ -4,11 +4,14 @@ from sanic import Blueprint
 
 from typing import Final
 
+from .user import auth
+from ..session import Codec
 from ..session.manager import SessionManager
 
 ws_blueprint: Final = Blueprint('ws', url_prefix='/')
 
-@ws_blueprint.websocket("/ws", name = 'ws')
+@ws_blueprint.websocket("/ws", name = 'ws', subprotocols = Codec.subprotocols())
 async def ws_handler(request: Request, ws: WebsocketImplProtocol):
-    session = SessionManager(request, ws)
+    user = await auth(request)
+    session = SessionManager(request, ws, user, Codec.negotiate(ws.subprotocol))
     await session.ws_handler()
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from sanic import text
 from sanic.request import Request
 from sanic.exceptions import SanicException
 
@@ -9,4 +8,5 @@ from ...exceptions import CodinCodException
 
 @app.exception(CodinCodException)
 def CodinCodg_error(request: Request, exception: CodinCodException):
-    raise SanicException(exception.msg, status_code = exception.status)
\ No newline at end of file
+    # raising from a handler is an error while handling an error, sanic renders it itself instead
+    return app.error_handler.default(request, SanicException(exception.msg, status_code = exception.status))
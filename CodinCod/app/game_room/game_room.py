@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from sanic import text, json
-from sanic.response import HTTPResponse
+from sanic import text
+from sanic.response import HTTPResponse, raw
 from sanic.request import Request
 from sanic.exceptions import BadRequest
 from bson.objectid import ObjectId
@@ -13,6 +13,19 @@ from ..user import auth
 from ...game_room import GameRoom
 
 
+def snapshot_response(request: Request, game: GameRoom) -> HTTPResponse:
+    """
+    The cached snapshot of the game, or a 304 if the client already has this version.
+    """
+    headers = {"ETag": game.etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("If-None-Match", "")
+    if game.etag in (tag.strip() for tag in if_none_match.split(",")):
+        return HTTPResponse(status=304, headers=headers)
+
+    return raw(game.snapshot(), content_type="application/json", headers=headers)
+
+
 @game_room_blueprint.get('/info')
 async def game_info(request: Request) -> HTTPResponse:
     args = request.args
@@ -25,13 +38,13 @@ async def game_info(request: Request) -> HTTPResponse:
     except InvalidId:
         raise BadRequest("Invalid game id!")
 
-    game = GameRoom.get_by_id(game_id)
-    return json(game.as_dict())
+    game = await GameRoom.get_by_id(game_id)
+    return snapshot_response(request, game)
 
 
 @game_room_blueprint.post('/join')
 async def game_join(request: Request) -> HTTPResponse:
-    user = auth(request)
+    user = await auth(request)
 
     if "id" not in request.json:
         raise BadRequest("No game id was provided")
@@ -41,15 +54,15 @@ async def game_join(request: Request) -> HTTPResponse:
     except InvalidId:
         raise BadRequest("Invalid game id!")
 
-    game = GameRoom.get_by_id(game_id)
+    game = await GameRoom.get_by_id(game_id)
     game.add_player(user)
 
-    return json(game.as_dict())
+    return snapshot_response(request, game)
 
 
 @game_room_blueprint.post('/start')
 async def game_start(request: Request) -> HTTPResponse:
-    user = auth(request)
+    user = await auth(request)
 
     if "id" not in request.json:
         raise BadRequest("No game id was provided")
@@ -59,18 +72,19 @@ async def game_start(request: Request) -> HTTPResponse:
     except InvalidId:
         raise BadRequest("Invalid game id!")
 
-    game = GameRoom.get_by_id(game_id)
-    if game.creator is not user:
+    game = await GameRoom.get_by_id(game_id)
+    if game.creator.id != user.id:
         raise BadRequest("Only the game creator is allowed to start the game!")
 
     game.launch_game()
+    await game.update()
 
     return HTTPResponse()
 
 
 @game_room_blueprint.post('/leave')
 async def game_leave(request: Request) -> HTTPResponse:
-    user = auth(request)
+    user = await auth(request)
 
     if "id" not in request.json:
         raise BadRequest("No game id was provided")
@@ -80,7 +94,7 @@ async def game_leave(request: Request) -> HTTPResponse:
     except InvalidId:
         raise BadRequest("Invalid game id!")
 
-    game = GameRoom.get_by_id(game_id)
+    game = await GameRoom.get_by_id(game_id)
     game.remove_player(user)
 
     return HTTPResponse()
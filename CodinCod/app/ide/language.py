@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sanic import json
+from sanic.response import raw
 from sanic.request import Request
 
 from . import ide_blueprint
@@ -9,4 +9,4 @@ from ...piston import Language
 
 @ide_blueprint.get('/languages')
 async def login(request: Request):
-    return json(Language.all())
+    return raw(Language.serialized(), content_type="application/json")
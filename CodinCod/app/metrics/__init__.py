@@ -0,0 +1,9 @@
+__all__ = ("metrics_blueprint", )
+
+from typing import Final
+from sanic import Blueprint
+
+metrics_blueprint: Final = Blueprint('metrics', url_prefix='/metrics')
+
+from . import auth
+from . import metrics
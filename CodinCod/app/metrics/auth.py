@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import secrets
+from typing import Final, Optional
+
+from sanic.request import Request
+from sanic.exceptions import NotFound, Unauthorized
+
+from . import metrics_blueprint
+from ...environment_variables import load_dotenv
+
+environment: Final = load_dotenv()
+
+# the metrics show user ids and backend urls, without a token they aren't served at all
+metrics_token: Final[Optional[str]] = environment.get("METRICS_TOKEN") or None
+
+
+@metrics_blueprint.on_request
+async def auth(request: Request):
+    if metrics_token is None:
+        raise NotFound("Metrics are disabled")
+
+    if request.token is None or not secrets.compare_digest(request.token.encode(), metrics_token.encode()):
+        raise Unauthorized("Invalid metrics token")
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from sanic import json
+from sanic.request import Request
+
+from . import metrics_blueprint
+
+from ...piston import executor, execution_scheduler, execution_cache
+from ...puzzle import Puzzle
+from ...user import password_hasher
+from ...game_room import GameRoom
+from ...timer import timer
+from ...session import hub, session_registry, heartbeat, resumption
+from ...chat import ChatRoom, chat_writer
+
+@metrics_blueprint.get('/execution')
+async def execution_metrics(request: Request):
+    return json({
+        "executor": executor.stats(),
+        "scheduler": execution_scheduler.stats(),
+        "cache": execution_cache.stats()
+    })
+
+
+@metrics_blueprint.get('/cache')
+async def cache_metrics(request: Request):
+    return json({
+        "puzzles": Puzzle.cache_stats()
+    })
+
+
+@metrics_blueprint.get('/auth')
+async def auth_metrics(request: Request):
+    return json({
+        "password_hasher": password_hasher.stats()
+    })
+
+
+@metrics_blueprint.get('/game_rooms')
+async def game_room_metrics(request: Request):
+    return json({
+        "active": GameRoom.active_count(),
+        "timer": timer.stats()
+    })
+
+
+@metrics_blueprint.get('/sessions')
+async def session_metrics(request: Request):
+    sessions = sorted(session_registry, key=lambda session: session.queue_depth, reverse=True)
+    return json({
+        "hub": hub.stats(),
+        "registry": session_registry.stats(),
+        "heartbeat": heartbeat.stats(),
+        "resumption": resumption.stats(),
+        "queued": sum(session.queue_depth for session in sessions),
+        # the most backed up sessions
+        "sessions": [session.stats() for session in sessions[:20]]
+    })
+
+
+@metrics_blueprint.get('/chat')
+async def chat_metrics(request: Request):
+    return json({
+        "rooms": ChatRoom.active_count(),
+        "writer": chat_writer.stats()
+    })
@@ -22,7 +22,7 @@ async def puzzle(request: Request):
         except InvalidId:
             raise BadRequest("Invalid puzzle id")
 
-        puzzle = Puzzle.get_by_id(puzzle_id)
+        puzzle = await Puzzle.get_by_id(puzzle_id)
         return json(puzzle.as_dict())
 
     if "author_id" in args:
@@ -31,14 +31,14 @@ async def puzzle(request: Request):
         except InvalidId:
             raise BadRequest("Invalid user id")
 
-        puzzles = Puzzle.get_by_author(author_id)
+        puzzles = await Puzzle.get_by_author(author_id)
         return json([puzzle.as_dict() for puzzle in puzzles])
 
     raise BadRequest("No puzzle_id/author_id was provided")
 
 @puzzle_blueprint.post("/run_testcase")
 async def run_testcase(request: Request):
-    user = auth(request)
+    user = await auth(request)
 
     # TODO:  eliminate repetition
 
@@ -54,10 +54,10 @@ async def run_testcase(request: Request):
     if "language" not in request.json:
         raise BadRequest("No language was provided")
 
-    puzzle = Puzzle.get_by_id(request.json["puzzle_id"])
+    puzzle = await Puzzle.get_by_id(request.json["puzzle_id"])
 
     try:
-        success, output = await puzzle.run_testcase(request.json["id"], request.json["code"], Language.get(request.json["language"]))
+        success, output = await puzzle.run_testcase(request.json["id"], request.json["code"], Language.get(request.json["language"]), user.id)
     
     except TestCaseFindException:
         raise BadRequest("Invalid test case id")
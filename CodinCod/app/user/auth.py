@@ -2,11 +2,12 @@ from __future__ import annotations
 from sanic.request import Request
 from sanic.exceptions import Unauthorized
 from bson.objectid import ObjectId
+from bson.errors import InvalidId
 
 from ...user import User
 from ...user.exception import UserFindException, UserAuthException
 
-def auth(request: Request):
+async def auth(request: Request):
     try:
         token: str = request.cookies["token"]
         user_id: str = request.cookies["user_id"]
@@ -15,7 +16,7 @@ def auth(request: Request):
         raise Unauthorized("User is not logged in!")
 
     try:
-        return User.auth_by_token(ObjectId(user_id), token)
+        return await User.auth_by_token(ObjectId(user_id), token)
     
-    except (UserAuthException, UserFindException):
+    except (UserAuthException, UserFindException, InvalidId):
         raise Unauthorized("Failed to authorize")
\ No newline at end of file
@@ -11,7 +11,17 @@ from bson.errors import InvalidId
 from validate_email import validate_email
 
 from . import user_blueprint
-from ...user import User
+from .auth import auth
+from ...user import User, Token
+from ...user.exception import UserFindException
+
+
+def set_token_cookies(response: HTTPResponse, user: User, token: str):
+    max_age = int(Token.lifetime.total_seconds())
+    for name, value in (("token", token), ("user_id", str(user.id))):
+        response.cookies[name] = value
+        response.cookies[name]["httponly"] = True
+        response.cookies[name]["max-age"] = max_age
 
 @user_blueprint.get('/users')
 async def users(request: Request):
@@ -22,11 +32,11 @@ async def users(request: Request):
         except InvalidId:
             raise BadRequest("Invalid user id!")
             
-        user = User.get_by_id(user_id)
+        user = await User.get_by_id(user_id)
         return json(user.public_info())
 
     if "search_by_nickname" in args:
-        users = User.get_list_by_nickname(
+        users = await User.get_list_by_nickname(
             str(args["search_by_nickname"][0]))
 
         transformed_users = []
@@ -36,7 +46,7 @@ async def users(request: Request):
         return json(transformed_users)
 
     if "nickname" in args:
-        user = User.get_by_nickname(str(args["nickname"][0]))
+        user = await User.get_by_nickname(str(args["nickname"][0]))
         return json(user.public_info())
 
     raise BadRequest("Invalid request: missing arguments")
@@ -55,14 +65,14 @@ async def register(request: Request):
     ):
         return text("Email is not valid", status = 400)
 
-    user, token = User.create(
+    user, token = await User.create(
         nickname=nickname,
         email=email,
         password=password
     )
 
     response = HTTPResponse()
-    response.cookies["token"] = token
+    set_token_cookies(response, user, token)
 
     return response
 
@@ -74,15 +84,28 @@ async def login(request: Request):
     nickname: str = content["nickname"]
     password: str = content["password"]
 
-    user = User.get_by_nickname(nickname)
-    if user is None:
+    try:
+        user = await User.get_by_nickname(nickname)
+    except UserFindException:
         raise Unauthorized("Password or Nickname is incorrect")
 
-    iscorrect, token = user.verify_password(password)
-    if not iscorrect:
+    token = await user.login(password)
+    if token is None:
         raise Unauthorized("Password or Nickname is incorrect")
 
     response = HTTPResponse()
-    response.cookies["token"] = token
+    set_token_cookies(response, user, token)
+
+    return response
+
+
+@user_blueprint.post('/logout')
+async def logout(request: Request):
+    await auth(request)
+    await Token.revoke(request.cookies["token"])
+
+    response = HTTPResponse()
+    del response.cookies["token"]
+    del response.cookies["user_id"]
 
     return response
\ No newline at end of file
@@ -0,0 +1,4 @@
+__all__ = ("LRUCache", "SingleFlight")
+
+from .lru import LRUCache
+from .single_flight import SingleFlight
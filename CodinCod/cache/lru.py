@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+__all__ = ("LRUCache", )
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class _Entry(Generic[V]):
+    value: V
+    expires_at: float
+    size: int
+
+
+@dataclass
+class LRUCache(Generic[K, V]):
+    """
+    In-process cache with least recently used eviction.
+    Bounded by number of entries and optionally by the total size of the values,
+    entries older than ttl (secs) are treated as missing.
+    """
+    max_entries: int = 1024
+    ttl: Optional[float] = None  # secs
+    max_size: Optional[int] = None
+    sizeof: Callable[[V], int] = lambda value: 0
+
+    _entries: OrderedDict[K, _Entry[V]] = field(init=False, default_factory=OrderedDict)
+    _size: int = field(init=False, default=0)
+
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+    evictions: int = field(init=False, default=0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires_at > monotonic()
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+
+        if entry is not None and entry.expires_at <= monotonic():
+            self.invalidate(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None):
+        """
+        Stores the value, ttl overrides the default ttl of the cache for this entry.
+        """
+        self.invalidate(key)
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = monotonic() + ttl if ttl is not None else float("inf")
+        entry = _Entry(value, expires_at, self.sizeof(value))
+
+        # values that are bigger than the whole cache aren't worth evicting everything else for
+        if self.max_size is not None and entry.size > self.max_size:
+            return
+
+        self._entries[key] = entry
+        self._size += entry.size
+
+        while len(self._entries) > self.max_entries or\
+                self.max_size is not None and self._size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self.evictions += 1
+
+    def invalidate(self, key: K) -> bool:
+        """
+        Removes the entry, returns whether there was one.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+
+        self._size -= entry.size
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
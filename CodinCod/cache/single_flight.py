@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+__all__ = ("SingleFlight", )
+
+import asyncio
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class SingleFlight(Generic[K, V]):
+    """
+    Concurrent loads of the same key share a single one, e.g. cache misses sharing one query.
+    The load runs in its own task and callers await it through asyncio.shield,
+    so a cancelled caller (like a handler whose client disconnected) doesn't fail the others.
+    """
+    _loading: dict[K, asyncio.Task[V]] = field(init=False, default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self._loading)
+
+    async def load(self, key: K, loader: Callable[[K], Awaitable[V]]) -> V:
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.ensure_future(loader(key))
+            task.add_done_callback(partial(self._loaded, key))
+
+        return await asyncio.shield(task)
+
+    def _loaded(self, key: K, task: asyncio.Future[V]):
+        del self._loading[key]
+        # every caller may have been cancelled, nobody else would retrieve the exception
+        if not task.cancelled():
+            task.exception()
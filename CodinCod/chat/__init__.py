@@ -0,0 +1,19 @@
+__all__ = ("ChatRoom", "ChatMessage", "ChatWriter", "TokenBucket", "chat_writer",
+           "chat_messages_collection", "ChatException")
+
+from typing import Final
+
+from ..environment_variables import load_dotenv
+from .collection import chat_messages_collection
+from .exception import ChatException
+from .chat_message import ChatMessage
+from .rate_limit import TokenBucket
+from .writer import ChatWriter
+
+environment: Final = load_dotenv()
+
+chat_writer: Final = ChatWriter(
+    flush_interval = float(environment.get("CHAT_FLUSH_INTERVAL") or 2),
+    max_batch = int(environment.get("CHAT_FLUSH_BATCH") or 500))
+
+from .chat_room import ChatRoom
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+__all__ = ("ChatMessage", )
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from bson.objectid import ObjectId
+
+
+@dataclass(eq=False, kw_only=True)
+class ChatMessage:
+    _id: ObjectId
+    room_id: ObjectId
+    user_id: ObjectId
+    nickname: str
+    text: str
+    sent_at: datetime
+    edited_at: Optional[datetime] = None
+    deleted: bool = False
+
+    @property
+    def id(self):
+        return self._id
+
+    @classmethod
+    def from_dict(cls, info: dict) -> ChatMessage:
+        return cls(
+            _id=info["_id"], room_id=info["room_id"], user_id=info["user_id"],
+            nickname=info["nickname"], text=info["text"], sent_at=info["sent_at"],
+            edited_at=info.get("edited_at"), deleted=info.get("deleted", False))
+
+    def as_db_dict(self) -> dict[str, Any]:
+        return {
+            "_id": self.id,
+            "room_id": self.room_id,
+            "user_id": self.user_id,
+            "nickname": self.nickname,
+            "text": self.text,
+            "sent_at": self.sent_at,
+            "edited_at": self.edited_at,
+            "deleted": self.deleted
+        }
+
+    def public_info(self) -> dict[str, Any]:
+        return {
+            "_id": str(self.id),
+            "user_id": str(self.user_id),
+            "nickname": self.nickname,
+            "text": self.text,
+            "sent_at": self.sent_at.isoformat(),
+            "edited_at": self.edited_at.isoformat() if self.edited_at is not None else None
+        }
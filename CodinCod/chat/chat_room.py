@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+__all__ = ("ChatRoom", )
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, ClassVar, Final
+
+from bson.objectid import ObjectId
+from pymongo import InsertOne, UpdateOne
+
+from . import chat_writer
+from .chat_message import ChatMessage
+from .collection import chat_messages_collection
+from .exception import ChatException, ChatRateLimitException
+from .rate_limit import TokenBucket
+from ..cache import LRUCache
+from ..environment_variables import load_dotenv
+from ..session import Session, Message, MessageType, hub
+from ..user import User
+
+environment: Final = load_dotenv()
+
+
+@dataclass(eq=False)
+class ChatRoom:
+    """
+    Chat of a game room.
+    The last history_size messages are kept in a ring buffer, indexed by id so editing
+    or deleting one never searches the buffer; older messages can't be changed anymore.
+    Every user has a token bucket shared by all chat rooms, to limit how fast they can write.
+    Chat rooms are kept in memory while someone is in them, apart from the game rooms
+    which may be loaded again for every request once finished.
+    """
+    __rooms: ClassVar[dict[ObjectId, ChatRoom]] = {}
+
+    history_size: ClassVar[int] = int(environment.get("CHAT_HISTORY_SIZE") or 100)
+    max_length: ClassVar[int] = int(environment.get("CHAT_MESSAGE_MAX_LENGTH") or 500)
+    rate: ClassVar[float] = float(environment.get("CHAT_RATE") or 1)  # messages per sec
+    burst: ClassVar[int] = int(environment.get("CHAT_BURST") or 5)
+    # the ttl restarts at every message, the bucket of a user idle for burst / rate secs
+    # is full again and forgetting it changes nothing
+    __buckets: ClassVar[LRUCache[ObjectId, TokenBucket]] = LRUCache(max_entries=65536, ttl=burst / rate)
+
+    room_id: ObjectId
+
+    _history: deque[ChatMessage] = field(init=False)
+    _by_id: dict[ObjectId, ChatMessage] = field(init=False, default_factory=dict)
+    # user id => sessions of the user in the chat
+    _members: dict[ObjectId, int] = field(init=False, default_factory=dict)
+    # sessions waiting for the history to load, not counted in _members yet
+    _joining: int = field(init=False, default=0)
+    _loaded: bool = field(init=False, default=False)
+    _loading: asyncio.Lock = field(init=False, default_factory=asyncio.Lock)
+
+    def __post_init__(self):
+        self._history = deque(maxlen=self.history_size)
+
+    @classmethod
+    def get(cls, room_id: ObjectId) -> ChatRoom:
+        """
+        The chat of a game room, the same object for as long as someone is in it.
+        """
+        chat_room = cls.__rooms.get(room_id)
+        if chat_room is None:
+            chat_room = cls.__rooms[room_id] = cls(room_id)
+        return chat_room
+
+    @classmethod
+    def active_count(cls) -> int:
+        return len(cls.__rooms)
+
+    def _release(self):
+        """
+        Forgets the chat once nobody is in it, the next join loads it again from the db.
+        """
+        if not self._members and not self._joining and self.__rooms.get(self.room_id) is self:
+            del self.__rooms[self.room_id]
+
+    @property
+    def topic(self) -> str:
+        return f"chat:{self.room_id}"
+
+    async def _load(self):
+        """
+        Restores the history from the db the first time someone joins.
+        """
+        async with self._loading:
+            if self._loaded:
+                return
+
+            # a previous object of this chat may still have writes queued
+            await chat_writer.flush()
+
+            cursor = chat_messages_collection.find(
+                {"room_id": self.room_id}).sort("_id", -1).limit(self.history_size)
+            for info in reversed(await cursor.to_list(self.history_size)):
+                self._append(ChatMessage.from_dict(info))
+
+            self._loaded = True
+
+    def _append(self, message: ChatMessage):
+        if len(self._history) == self._history.maxlen:
+            self._by_id.pop(self._history[0].id, None)
+
+        self._history.append(message)
+        if not message.deleted:
+            self._by_id[message.id] = message
+
+    def history(self) -> list[dict[str, Any]]:
+        return [message.public_info() for message in self._history if not message.deleted]
+
+    def publish(self, message_type: MessageType, content: Any):
+        hub.publish(self.topic, Message(message_type, content))
+
+    async def join(self, session: Session):
+        self._joining += 1
+        try:
+            await self._load()
+            # sent before subscribing, new messages can't get ahead of the history
+            await session.send(Message(MessageType.chat_history, self.history()))
+        except BaseException:
+            self._joining -= 1
+            self._release()
+            raise
+        self._joining -= 1
+
+        hub.subscribe(self.topic, session)
+
+        user = session.user
+        self._members[user.id] = self._members.get(user.id, 0) + 1
+        if self._members[user.id] == 1:
+            self.publish(MessageType.user_joined_chat, user.public_info())
+
+    def leave(self, session: Session):
+        if session not in hub.subscribers(self.topic):
+            return
+        hub.unsubscribe(self.topic, session)
+
+        user = session.user
+        self._members[user.id] -= 1
+        if not self._members[user.id]:
+            del self._members[user.id]
+            self.publish(MessageType.user_left_chat, user.public_info())
+            self._release()
+
+    def _check_rate(self, user_id: ObjectId):
+        bucket = self.__buckets.get(user_id) or TokenBucket(self.rate, self.burst)
+        # set again every time, an empty bucket must not expire while its user keeps sending
+        self.__buckets.set(user_id, bucket)
+
+        if not bucket.take():
+            raise ChatRateLimitException("Slow down! You are sending messages too fast", status=429)
+
+    def _check_text(self, text: Any) -> str:
+        if type(text) is not str or not 1 <= len(text.strip()) <= self.max_length:
+            raise ChatException(f"Messages must be between 1 and {self.max_length} characters")
+        return text.strip()
+
+    def _get_own(self, user: User, message_id: ObjectId) -> ChatMessage:
+        message = self._by_id.get(message_id)
+        if message is None:
+            raise ChatException("Can't find the message, it may be too old")
+        if message.user_id != user.id:
+            raise ChatException("Only the author can change a message")
+        return message
+
+    def send(self, user: User, text: Any) -> ChatMessage:
+        text = self._check_text(text)
+        self._check_rate(user.id)
+
+        message = ChatMessage(
+            _id=ObjectId(), room_id=self.room_id, user_id=user.id,
+            nickname=user.nickname, text=text, sent_at=datetime.now())
+
+        self._append(message)
+        chat_writer.add(InsertOne(message.as_db_dict()))
+        self.publish(MessageType.message_sent, message.public_info())
+        return message
+
+    def edit(self, user: User, message_id: ObjectId, text: Any):
+        text = self._check_text(text)
+        message = self._get_own(user, message_id)
+        self._check_rate(user.id)
+
+        message.text = text
+        message.edited_at = datetime.now()
+
+        chat_writer.add(UpdateOne(
+            {"_id": message.id}, {"$set": {"text": message.text, "edited_at": message.edited_at}}))
+        self.publish(MessageType.message_edited, {
+            "_id": str(message.id),
+            "text": message.text,
+            "edited_at": message.edited_at.isoformat()
+        })
+
+    def delete(self, user: User, message_id: ObjectId):
+        message = self._get_own(user, message_id)
+        self._check_rate(user.id)
+
+        # stays in the ring buffer until it's pushed out, history() skips it
+        message.deleted = True
+        del self._by_id[message.id]
+
+        chat_writer.add(UpdateOne({"_id": message.id}, {"$set": {"deleted": True}}))
+        self.publish(MessageType.message_deleted, {"_id": str(message.id)})
@@ -0,0 +1,4 @@
+from ..database import db_client, register_index
+
+chat_messages_collection = db_client.get_collection("CHAT_MESSAGES")
+register_index(chat_messages_collection, [("room_id", 1), ("_id", -1)])
@@ -0,0 +1,9 @@
+__all__ = ("ChatException", "ChatRateLimitException")
+
+from ..exceptions import CodinCodException
+
+class ChatException(CodinCodException):
+    pass
+
+class ChatRateLimitException(ChatException):
+    pass
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+__all__ = ("TokenBucket", )
+
+from dataclasses import dataclass, field
+from time import monotonic
+
+
+@dataclass
+class TokenBucket:
+    """
+    Allows burst actions at once, then rate actions per second.
+    """
+    rate: float  # tokens per sec
+    burst: int
+
+    tokens: float = field(init=False)
+    updated_at: float = field(init=False, default_factory=monotonic)
+
+    def __post_init__(self):
+        self.tokens = self.burst
+
+    def take(self) -> bool:
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
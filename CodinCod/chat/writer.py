@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+__all__ = ("ChatWriter", )
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from pymongo.errors import PyMongoError
+
+from .collection import chat_messages_collection
+from ..timer import timer, TimerHandle
+
+
+@dataclass
+class ChatWriter:
+    """
+    Write-behind persistence of the chat: changes are queued in memory
+    and written in batches, at most flush_interval after they happened.
+    Sending a chat message never waits on the db.
+    """
+    flush_interval: float = 2  # secs
+    max_batch: int = 500
+
+    written: int = field(init=False, default=0)
+    failed: int = field(init=False, default=0)
+
+    # pymongo write operations, in order
+    _pending: list[Any] = field(init=False, default_factory=list)
+    _handle: Optional[TimerHandle] = field(init=False, default=None)
+    # a batch is only written once the previous one is, so the operations stay in order
+    _lock: asyncio.Lock = field(init=False, default_factory=asyncio.Lock)
+
+    def add(self, operation: Any):
+        self._pending.append(operation)
+
+        if len(self._pending) >= self.max_batch:
+            if self._handle is not None:
+                self._handle.cancel()
+            self._handle = timer.call_later(0, self.flush)
+
+        elif self._handle is None:
+            self._handle = timer.call_later(self.flush_interval, self.flush)
+
+    async def flush(self):
+        """
+        Writes everything pending, also called directly at shutdown.
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+
+                try:
+                    await chat_messages_collection.bulk_write(batch, ordered=True)
+                    self.written += len(batch)
+                except PyMongoError:
+                    # chat history isn't worth blocking the next batches on
+                    self.failed += len(batch)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "failed": self.failed,
+        }
@@ -1,12 +1,35 @@
-__all__ = ["db_client"]
+__all__ = ["db_client", "register_index", "create_indexes"]
 
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from pymongo.server_api import ServerApi
-from typing import Final
+from typing import Any, Final
 
 from ..environment_variables import load_dotenv
 
+environment: Final = load_dotenv()
+
 database_name: Final  = "CodinCod"
-connection_string: Final = load_dotenv()['DATABASE_CONNECTION_STRING']
-db_client: Final = MongoClient(connection_string, server_api=ServerApi('1'))[database_name]
\ No newline at end of file
+connection_string: Final = environment['DATABASE_CONNECTION_STRING']
+db_client: Final = AsyncIOMotorClient(
+    connection_string,
+    server_api=ServerApi('1'),
+    maxPoolSize=int(environment.get("DATABASE_MAX_POOL_SIZE") or 100),
+    minPoolSize=int(environment.get("DATABASE_MIN_POOL_SIZE") or 0),
+    waitQueueTimeoutMS=int(environment.get("DATABASE_WAIT_QUEUE_TIMEOUT_MS") or 10000)
+)[database_name]
+
+__indexes: Final[list[tuple[AsyncIOMotorCollection, Any, dict[str, Any]]]] = []
+
+
+def register_index(collection: AsyncIOMotorCollection, keys: Any, **kwargs: Any):
+    """
+    Indexes can only be created from inside the event loop,
+    they are created by create_indexes() when the app starts.
+    """
+    __indexes.append((collection, keys, kwargs))
+
+
+async def create_indexes():
+    for collection, keys, kwargs in __indexes:
+        await collection.create_index(keys, **kwargs)
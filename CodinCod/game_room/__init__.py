@@ -2,4 +2,5 @@ from .state import GameRoomState
 from .visibility import GameRoomVisibility
 from .config import GameRoomConfig
 from .collection import games_collection
+from .leaderboard import Leaderboard
 from .game_room import GameRoom
\ No newline at end of file
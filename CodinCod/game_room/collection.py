@@ -1,4 +1,5 @@
 import pymongo
-from ..database import db_client
+from ..database import db_client, register_index
 
-games_collection = db_client.get_collection("GAMES")
\ No newline at end of file
+games_collection = db_client.get_collection("GAMES")
+register_index(games_collection, "state")
\ No newline at end of file
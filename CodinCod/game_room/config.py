@@ -19,6 +19,8 @@ class GameRoomConfig:
 
     duration_minutes: int = 15
     visibility: GameRoomVisibility = GameRoomVisibility.PUBLIC
+    # events published within a tick are sent as one batch message, 0 sends every event right away
+    broadcast_tick_ms: int = 0
 
     @classmethod
     def from_dict(cls, info: dict) -> GameRoomConfig:
@@ -26,9 +28,10 @@ class GameRoomConfig:
         visibility_name = info["visibility"]
         return cls(
             game_mode = PuzzleType[game_mode_name],
-            languages = tuple(Language.get(lang_name) for lang_name in info["langugaes"]),
+            languages = tuple(Language.get(lang_name) for lang_name in info["languages"]),
             duration_minutes = info["duration_minutes"],
-            visibility = GameRoomVisibility(visibility_name)
+            visibility = GameRoomVisibility[visibility_name],
+            broadcast_tick_ms = info.get("broadcast_tick_ms", 0)
         )
 
 
@@ -37,5 +40,6 @@ class GameRoomConfig:
             "game_mode": self.game_mode.name,
             "languages": tuple(lang.name for lang in self.languages),
             "duration_minutes": self.duration_minutes,
-            "visiblitity": self.visibility.name
+            "visibility": self.visibility.name,
+            "broadcast_tick_ms": self.broadcast_tick_ms
         }
\ No newline at end of file
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+import secrets
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 
-from typing import Optional, cast, ClassVar, Any
+from typing import Iterator, Optional, cast, ClassVar, Any, Final
 from bson.objectid import ObjectId
 
-from . import GameRoomState, GameRoomVisibility, GameRoomConfig
+from . import GameRoomState, GameRoomVisibility, GameRoomConfig, Leaderboard
 from . import games_collection
 from .exception import GameRoomException, GameLaunchException
 
@@ -14,8 +18,14 @@ from ..submission import Submission
 from ..puzzle import Puzzle
 
 from ..user import User
-from ..session import Session, SessionException
+from ..session import Session, SessionException, Message, MessageType, EventLog, Codec
+from ..session import hub, session_registry, resumption
 from ..submission import SubmissionException
+from ..timer import timer, TimerHandle
+from ..cache import SingleFlight
+from ..environment_variables import load_dotenv
+
+environment: Final = load_dotenv()
 
 
 # TODO: for version 0.2.0:
@@ -25,7 +35,15 @@ from ..submission import SubmissionException
 
 @dataclass(eq=False, kw_only=True)
 class GameRoom:
-    __active_gamerooms: ClassVar[dict[ObjectId, GameRoom]]
+    __active_gamerooms: ClassVar[dict[ObjectId, GameRoom]] = {}
+    __loading: ClassVar[SingleFlight[ObjectId, GameRoom]] = SingleFlight()
+
+    # time left to judge the final submissions once the game ended
+    processing_duration: ClassVar[timedelta] = timedelta(
+        seconds=int(environment.get("GAME_PROCESSING_SECONDS") or 30))
+    # finished games stay in memory a bit, for the clients still polling the results
+    finished_retention: ClassVar[timedelta] = timedelta(
+        seconds=int(environment.get("GAME_FINISHED_RETENTION_SECONDS") or 60))
 
     _id: ObjectId
     creator: User
@@ -38,24 +56,70 @@ class GameRoom:
     players: dict[ObjectId, User]
     submissions: dict[ObjectId, Submission]
 
-    # includes both players sessions and spectators
-    sessions: dict[User, set[Session]] = field(default_factory=dict)
+    # best submission of every player, built from submissions
+    leaderboard: Leaderboard = field(init=False)
+
+    # published messages, for the clients resuming their session
+    events: EventLog = field(init=False, default_factory=EventLog)
+
+    # bumped by every change visible in as_dict
+    version: int = field(init=False, default=0)
+    # tells apart objects of the same game, e.g. after a restart the versions start over
+    _instance_tag: str = field(init=False, default_factory=lambda: secrets.token_hex(4), repr=False)
+    _snapshot: Optional[tuple[int, bytes]] = field(init=False, default=None, repr=False)
+    # codec => ((version, seq), encoded game_snapshot message)
+    _snapshot_frames: dict[Codec, tuple[tuple[int, int], str | bytes]] = field(
+        init=False, default_factory=dict, repr=False)
+
+    # logged events waiting for the next broadcast tick, see config.broadcast_tick_ms
+    _pending_events: list[tuple[Message, Optional[MessageType]]] = field(init=False, default_factory=list, repr=False)
+    _broadcast: Optional[TimerHandle] = field(init=False, default=None, repr=False)
+
+    # next state transition, only set while the game is active
+    _transition: Optional[TimerHandle] = field(init=False, default=None, repr=False)
+
+    def __post_init__(self):
+        self.leaderboard = Leaderboard(self.config.game_mode)
+        for submission in self.submissions.values():
+            self.leaderboard.add(submission)
 
     @property
     def id(self):
         return self._id
 
+    def sessions(self) -> Iterator[Session]:
+        """
+        Sessions watching the game, both players and spectators.
+        """
+        return session_registry.in_room(self.id)
+
+    @property
+    def topic(self) -> str:
+        """
+        Hub topic of the game events.
+        """
+        return f"game_room:{self.id}"
+
+    @property
+    def etag(self) -> str:
+        # finished games don't change anymore, but they are loaded again for every request;
+        # their tag only depends on what's stored and the version in the body,
+        # so it stays the same across loads (which all start over at version 0)
+        if self.state is GameRoomState.FINISHED:
+            return f'"{self.id}-finished-{int(self.end_time.timestamp())}-{self.version}"'
+        return f'"{self.id}-{self._instance_tag}-{self.version}"'
+
     @property
     def end_time(self) -> datetime:
         """Returns the end time """
         return self.start_time + timedelta(minutes=self.config.duration_minutes)
 
     @classmethod
-    def create(cls, *, creator: User, puzzle: Puzzle, config: GameRoomConfig, start_time: datetime) -> GameRoom:
+    async def create(cls, *, creator: User, puzzle: Puzzle, config: GameRoomConfig, start_time: datetime) -> GameRoom:
         """
         Creates a new gameroom and store it in db. 
         """
-        result = games_collection.insert_one(
+        result = await games_collection.insert_one(
             {
                 "creator_id": creator.id,
                 "puzzle_id": puzzle.id,
@@ -66,52 +130,72 @@ class GameRoom:
                 "submissions_ids": []
             }
         )
-        game_room = cls.get_from_db_by_id(result.inserted_id)
-        assert game_room is not None
-        return game_room
+        return await cls.get_by_id(result.inserted_id)
 
     @classmethod
-    def get_by_id(cls, gameroom_id: ObjectId) -> GameRoom:
+    async def get_by_id(cls, gameroom_id: ObjectId) -> GameRoom:
         """
-        Tries to find a GameRoom object with the given id from memory and db.
-        Returns None if no active GameRoom with that id exists.
+        Active games are served from memory.
+        Others are loaded from the db, and kept in memory if they aren't finished yet.
+        Raises a GameRoomException if the game room doesn't exist.
         """
         game_room = cls.get_active_gameroom(gameroom_id)
         if game_room is not None:
             return game_room
 
-        return cls.get_from_db_by_id(gameroom_id)
+        # concurrent lookups share one load, there can only be one object per active game
+        return await cls.__loading.load(gameroom_id, cls._load)
 
     @classmethod
-    def get_from_db_by_id(cls, gameroom_id: ObjectId) -> GameRoom:
+    async def _load(cls, gameroom_id: ObjectId) -> GameRoom:
+        game_room = await cls.get_from_db_by_id(gameroom_id)
+        if game_room.state is not GameRoomState.FINISHED:
+            game_room.activate()
+        return game_room
+
+    @classmethod
+    async def restore_active(cls):
+        """
+        Loads every game that isn't finished, so their state transitions fire
+        even if nobody looks them up. Called when the app starts.
+        """
+        cursor = games_collection.find({"state": {"$ne": GameRoomState.FINISHED.name}}, {"_id": True})
+        game_ids = [info["_id"] for info in await cursor.to_list(None)]
+        results = await asyncio.gather(*(cls.get_by_id(game_id) for game_id in game_ids), return_exceptions=True)
+
+        for game_id, result in zip(game_ids, results):
+            if isinstance(result, BaseException):
+                logging.error(f"Couldn't restore game room {game_id}", exc_info=result)
+
+    @classmethod
+    async def get_from_db_by_id(cls, gameroom_id: ObjectId) -> GameRoom:
         """
         Tries to find a GameRoom object with the given id from memory.
         Returns None if no active GameRoom with that id exists.
         """
-        info = games_collection.find_one({"_id": gameroom_id})
+        info = await games_collection.find_one({"_id": gameroom_id})
 
         if info is None:
             raise GameRoomException("Can't find GameRoom")
 
         info = cast(dict[str, Any], info)
-        return cls.from_db_dict(info)
+        return await cls.from_db_dict(info)
 
     @classmethod
-    def from_db_dict(cls, info: dict) -> GameRoom:
-        creator = User.get_by_id(info["creator_id"])
-        puzzle = Puzzle.get_by_id(info["puzzle_id"])
-
-        players = {}
-        for player_id in info["players_ids"]:
-            player = User.get_by_id(player_id)
-            players[player_id] = player
-
-        submissions = {}
-        for submission_id in info["submissions_ids"]:
-            submission = Submission.get_by_id(submission_id)
-            # TODO: remove after updating submission API
-            assert submission is not None
-            submissions[submission_id] = submissions
+    async def from_db_dict(cls, info: dict) -> GameRoom:
+        """
+        Loads everything the game room refers to concurrently,
+        with one query per collection whatever the size of the room.
+        """
+        players_ids: list[ObjectId] = info["players_ids"]
+
+        users, puzzle, submissions = await asyncio.gather(
+            User.get_many([info["creator_id"], *players_ids]),
+            Puzzle.get_by_id(info["puzzle_id"]),
+            Submission.get_many(info["submissions_ids"]))
+
+        creator = users[info["creator_id"]]
+        players = {player_id: users[player_id] for player_id in players_ids}
 
         return cls(
             _id=info["_id"],
@@ -125,21 +209,65 @@ class GameRoom:
         )
 
     @classmethod
-    def get_active_gameroom(cls, gameroom_id: ObjectId) -> GameRoom:
+    def get_active_gameroom(cls, gameroom_id: ObjectId) -> Optional[GameRoom]:
         """
         Tries to find a GameRoom object with the given id from memory.
         Returns None if no active GameRoom with that id exists
         (it may still exist in the database).
         """
-        if gameroom_id not in cls.__active_gamerooms:
-            raise GameRoomException("Can't find GameRoom")
+        return cls.__active_gamerooms.get(gameroom_id)
 
-        return cls.__active_gamerooms[gameroom_id]
+    @classmethod
+    def active_count(cls) -> int:
+        return len(cls.__active_gamerooms)
 
-    def update(self):
-        games_collection.update_one(
+    def activate(self):
+        """
+        Registers the game in memory and schedules its next state transition.
+        """
+        self.__active_gamerooms[self.id] = self
+        self._schedule()
+
+    def _schedule(self):
+        if self._transition is not None:
+            self._transition.cancel()
+
+        match self.state:
+            case GameRoomState.WAITING_FOR_PLAYERS:
+                self._transition = timer.call_at(self.start_time, self._advance)
+            case GameRoomState.IN_PROGRESS:
+                self._transition = timer.call_at(self.end_time, self._advance)
+            case GameRoomState.PROCESSING_FINAL_SUBMISSIONS:
+                self._transition = timer.call_at(self.end_time + self.processing_duration, self._advance)
+            case GameRoomState.FINISHED:
+                self._transition = timer.call_later(self.finished_retention.total_seconds(), self._evict)
+
+    async def _advance(self):
+        """
+        Moves the game to its next state, WAITING_FOR_PLAYERS => IN_PROGRESS =>
+        PROCESSING_FINAL_SUBMISSIONS => FINISHED.
+        """
+        self._transition = None
+        self.state = GameRoomState(self.state.value + 1)
+        self.changed()
+        self.publish_state()
+        try:
+            # stored before scheduling the next transition, when catching up on passed deadlines
+            # it would fire right away and the writes could land out of order
+            await self.update()
+        finally:
+            self._schedule()
+
+    async def _evict(self):
+        self._transition = None
+        await self.update()
+        if self.__active_gamerooms.get(self.id) is self:
+            del self.__active_gamerooms[self.id]
+
+    async def update(self):
+        await games_collection.update_one(
             {'_id': self._id},
-            {
+            {"$set": {
                 "puzzle_id": self.puzzle.id,
                 "config": self.config.as_dict(),
                 "start_time": self.start_time.isoformat(),
@@ -147,7 +275,7 @@ class GameRoom:
                 "players_ids": [player_id for player_id in self.players]
                 if self.state != GameRoomState.WAITING_FOR_PLAYERS else [],
                 "submissions_ids": [submission_id for submission_id in self.submissions]
-            }
+            }}
         )
 
     def as_db_dict(self) -> dict[str, Any]:
@@ -162,9 +290,89 @@ class GameRoom:
             "puzzle": self.puzzle.id,
             "start_time": self.start_time.isoformat(),
             "submissions_ids": list(self.submissions.keys()),
-            "players_ids": list(self.submissions.keys())
+            "players_ids": list(self.players.keys())
         }
 
+    def changed(self):
+        """
+        Has to be called after anything in as_dict changed, it invalidates the snapshot.
+        """
+        self.version += 1
+
+    def publish(self, message_type: MessageType, content: Any, coalesce: bool = False):
+        """
+        coalesce: a newer message of this type supersedes the one still queued for a slow client.
+        """
+        message = self.events.append(Message(message_type, content))
+
+        if not self.config.broadcast_tick_ms:
+            coalesce_key = (self.topic, message_type) if coalesce else None
+            hub.publish(self.topic, message, coalesce_key)
+            return
+
+        if coalesce:
+            # superseded before anyone got it, the log still has it for resuming clients
+            self._pending_events = [event for event in self._pending_events if event[1] is not message_type]
+        self._pending_events.append((message, message_type if coalesce else None))
+
+        if self._broadcast is None:
+            self._broadcast = timer.call_later(self.config.broadcast_tick_ms / 1000, self.flush_events)
+
+    def flush_events(self):
+        """
+        Sends the events waiting for the broadcast tick, as a single batch message when there are several.
+        The batch is numbered like its last event, clients resume from there.
+        Called before sending a snapshot too, so the events it already includes aren't sent after it.
+        """
+        if self._broadcast is not None:
+            self._broadcast.cancel()
+            self._broadcast = None
+
+        pending, self._pending_events = self._pending_events, []
+        if not pending:
+            return
+
+        if len(pending) == 1:
+            message, coalesce_type = pending[0]
+            hub.publish(self.topic, message, None if coalesce_type is None else (self.topic, coalesce_type))
+            return
+
+        batch = [{"type": message.type, "content": message.content, "seq": message.seq} for message, _ in pending]
+        hub.publish(self.topic, Message(MessageType.batch, batch, pending[-1][0].seq))
+
+    def publish_state(self):
+        self.publish(MessageType.game_state_changed, {
+            "state": self.state.name,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat()
+        }, coalesce=True)
+
+        if self.state is GameRoomState.FINISHED:
+            self.publish(MessageType.game_results, self.leaderboard.as_list())
+
+    def snapshot(self) -> bytes:
+        """
+        as_dict encoded as json, only encoded again once the game changed.
+        """
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            self._snapshot = self.version, json.dumps(self.as_dict()).encode()
+        return self._snapshot[1]
+
+    def snapshot_frame(self, codec: Codec) -> str | bytes:
+        """
+        The game_snapshot message for websockets, numbered with the seq of the last published event;
+        the events numbered after it are the changes since the snapshot.
+        Encoded once per codec until the game changes, however many spectators subscribe.
+        """
+        key = self.version, self.events.last_seq
+        cached = self._snapshot_frames.get(codec)
+
+        if cached is None or cached[0] != key:
+            message = Message(MessageType.game_snapshot, self.as_dict(), self.events.last_seq)
+            cached = self._snapshot_frames[codec] = key, codec.encode(message)
+
+        return cached[1]
+
     def as_dict(self) -> dict[str, Any]:
         """
         Return a represention of the game room that can be sent
@@ -174,21 +382,20 @@ class GameRoom:
         for player in self.players.values():
             player_info = player.public_info()
 
-            submission = next((
-                submission for submission in self.submissions.values()
-                if submission.user_id == player.id
-            ), None)
-
+            submission = self.leaderboard.get(player.id)
             if submission is not None:
                 player_info["submission"] = submission.public_info()
+                player_info["rank"] = self.leaderboard.rank(player.id)
 
             players.append(player_info)
 
         return {
             "_id": str(self.id),
             "config": self.config.as_dict(),
-            "puzzle": self.puzzle.id,
+            "puzzle": str(self.puzzle.id),
             "start_time": self.start_time.isoformat(),
+            "state": self.state.name,
+            "version": self.version,
             "players": players
         }
 
@@ -198,22 +405,32 @@ class GameRoom:
         This makes the session recieve updates about the game.
         NOT JOINING THE GAME ROOM
         """
-        self.sessions[session.user].add(session)
+        session_registry.join_room(session, self.id)
+        hub.subscribe(self.topic, session)
 
-    def remove_session(self, session: Session):
+    def remove_session(self, session: Session, suspend: bool = False):
         """
         Remove session from gameroom.
-        Raises an excpetion if session is not in sessions.
+        suspend: the connection got lost, a player keeps its slot for the resume grace period.
         """
         user = session.user
-        self.sessions[user].remove(session)
+        if session_registry.room_of(session) == self.id:
+            session_registry.leave_room(session)
+        hub.unsubscribe(self.topic, session)
 
-        if self.sessions[user]:
+        if session_registry.of_user_in_room(self.id, user.id):
             return
-        del self.sessions[user]
 
+        if suspend:
+            timer.call_later(resumption.grace_period, lambda: self._remove_if_gone(user))
+            return
+
+        self._remove_if_gone(user)
+
+    def _remove_if_gone(self, user: User):
         if self.state is not GameRoomState.WAITING_FOR_PLAYERS or\
-                user.id not in self.players:
+                user.id not in self.players or\
+                session_registry.of_user_in_room(self.id, user.id):
             return
         self.remove_player(user)
 
@@ -222,7 +439,7 @@ class GameRoom:
         TODO: add docstring
         """
         # This stops bots from joining, and prevents weird bugs.
-        if user in self.sessions:
+        if not session_registry.of_user_in_room(self.id, user.id):
             raise SessionException(
                 "Can't join: the user doesn't have any sessions connected to gameroom!")
 
@@ -236,7 +453,8 @@ class GameRoom:
                 "Can't join: game already started!")
 
         self.players[user.id] = user
-        # TODO: update frontend through websocket
+        self.changed()
+        self.publish(MessageType.user_joined_game, user.public_info())
 
     def remove_player(self, user: User):
         """
@@ -251,7 +469,8 @@ class GameRoom:
                 "Can't remove player from Game: Game has already started!")
 
         del self.players[user.id]
-        # TODO: update frontend through websocket
+        self.changed()
+        self.publish(MessageType.user_left_game, user.public_info())
 
     def add_submission(self, submission: Submission):
         """
@@ -268,6 +487,15 @@ class GameRoom:
             raise SubmissionException(
                 "Can't add submission: Game is already finalized!")
         self.submissions[submission.id] = submission
+        if self.leaderboard.add(submission):
+            self.changed()
+
+        self.publish(MessageType.player_submitted, {
+            **submission.public_info(),
+            "score": submission.score,
+            "code_size": submission.code_size,
+            "rank": self.leaderboard.rank(submission.user_id)
+        })
 
     def launch_game(self, start_time: datetime | None = None):
         """
@@ -285,3 +513,8 @@ class GameRoom:
             self.start_time = datetime.now() + timedelta(seconds=5)
         else:
             self.start_time = start_time
+        self.changed()
+        self.publish_state()
+
+        if self.get_active_gameroom(self.id) is self:
+            self._schedule()
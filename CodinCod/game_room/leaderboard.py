@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+__all__ = ("Leaderboard", )
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from bson.objectid import ObjectId
+
+from ..puzzle import PuzzleType
+from ..submission import Submission
+
+
+@dataclass
+class Leaderboard:
+    """
+    Best submission of every player, kept sorted so standings never rescan the submissions.
+    Ranked by score, then code size for SHORTEST games, then submission time.
+    Submissions have to be scored before they are added, their rank isn't updated afterwards;
+    submissions that weren't judged yet are left out.
+    """
+    game_mode: PuzzleType
+
+    # (sort key, user id), the user id makes the order total
+    _ranking: list[tuple[tuple, ObjectId]] = field(init=False, default_factory=list)
+    _best: dict[ObjectId, tuple[tuple, Submission]] = field(init=False, default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self._best)
+
+    def __contains__(self, user_id: ObjectId) -> bool:
+        return user_id in self._best
+
+    def __iter__(self) -> Iterator[Submission]:
+        """
+        Best submissions, best ranked first.
+        """
+        return (self._best[user_id][1] for _, user_id in self._ranking)
+
+    def sort_key(self, submission: Submission) -> tuple:
+        if self.game_mode is PuzzleType.SHORTEST:
+            return -submission.score, submission.code_size, submission.submitted_at
+        return -submission.score, submission.submitted_at
+
+    def add(self, submission: Submission) -> bool:
+        """
+        Returns whether the submission became the best one of its user.
+        O(log n) to find the position, plus moving the entries after it.
+        """
+        if not submission.execution_finished:
+            return False
+
+        user_id = submission.user_id
+        key = self.sort_key(submission)
+
+        current = self._best.get(user_id)
+        if current is not None:
+            if current[0] <= key:
+                return False
+            del self._ranking[bisect_left(self._ranking, (current[0], user_id))]
+
+        self._best[user_id] = key, submission
+        insort(self._ranking, (key, user_id))
+        return True
+
+    def get(self, user_id: ObjectId) -> Optional[Submission]:
+        best = self._best.get(user_id)
+        return best[1] if best is not None else None
+
+    def rank(self, user_id: ObjectId) -> Optional[int]:
+        """
+        1 based, None if the user didn't submit anything.
+        """
+        best = self._best.get(user_id)
+        if best is None:
+            return None
+        return bisect_left(self._ranking, (best[0], user_id)) + 1
+
+    def top(self, count: int) -> list[Submission]:
+        return [self._best[user_id][1] for _, user_id in self._ranking[:count]]
+
+    def as_list(self, count: Optional[int] = None) -> list[dict[str, Any]]:
+        ranking = self._ranking if count is None else self._ranking[:count]
+        return [
+            {
+                "rank": rank,
+                "user_id": str(user_id),
+                "score": self._best[user_id][1].score,
+                "code_size": self._best[user_id][1].code_size,
+                "submitted_at": self._best[user_id][1].submitted_at.isoformat()
+            }
+            for rank, (_, user_id) in enumerate(ranking, 1)
+        ]
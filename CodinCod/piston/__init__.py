@@ -1,8 +1,52 @@
-__all__ = ("piston", "Language")
+__all__ = ("executor", "execution_scheduler", "execution_cache", "Language", "Priority", "Executor",
+           "PistonClient", "PistonPool", "LocalExecutor", "ExecutionScheduler", "ExecutionCache", "BatchHarness", "ExecutionResult", "PistonException", "SchedulerException")
 
-from pistonapi import PistonAPI
 from typing import Final
 
-piston: Final = PistonAPI()
+from ..environment_variables import load_dotenv
+from .exception import PistonException, SchedulerException
+from .priority import Priority
+from .result import ExecutionResult
+from .client import PistonClient
+from .executor import Executor
+from .pool import PistonPool
+from .local import LocalExecutor
+from .scheduler import ExecutionScheduler
+from .cache import ExecutionCache
+from .batch import BatchHarness
 
-from .language import Language
\ No newline at end of file
+environment: Final = load_dotenv()
+executor_backend: Final = environment.get("EXECUTOR_BACKEND") or "piston"
+
+executor: Executor
+if executor_backend == "piston":
+    executor = PistonPool(
+        [endpoint.strip()
+         for endpoint in (environment.get("PISTON_ENDPOINTS") or PistonClient.default_endpoint).split(",")
+         if endpoint.strip()],
+        health_check_interval = float(environment.get("PISTON_HEALTH_CHECK_INTERVAL") or 10),
+        max_failures = int(environment.get("PISTON_MAX_FAILURES") or 3),
+        hedge_percentile = float(environment["PISTON_HEDGE_PERCENTILE"])
+        if environment.get("PISTON_HEDGE_PERCENTILE") else None)
+
+elif executor_backend == "local":
+    executor = LocalExecutor(
+        language_names = environment["LOCAL_EXECUTOR_LANGUAGES"].split(",")
+        if environment.get("LOCAL_EXECUTOR_LANGUAGES") else None,
+        max_processes = int(environment.get("LOCAL_EXECUTOR_MAX_PROCESSES") or 8))
+
+else:
+    raise ValueError(f"EXECUTOR_BACKEND: unknown backend {executor_backend}, expected piston or local")
+
+execution_scheduler: Final = ExecutionScheduler(
+    max_running = int(environment.get("EXECUTION_MAX_RUNNING") or 16),
+    max_queued = int(environment.get("EXECUTION_MAX_QUEUED") or 256),
+    language_quota = int(environment.get("EXECUTION_LANGUAGE_QUOTA") or 8),
+    user_quota = int(environment.get("EXECUTION_USER_QUOTA") or 4))
+
+execution_cache: Final = ExecutionCache(
+    max_entries = int(environment.get("EXECUTION_CACHE_MAX_ENTRIES") or 4096),
+    ttl = float(environment.get("EXECUTION_CACHE_TTL") or 3600),
+    max_size = int(environment.get("EXECUTION_CACHE_MAX_SIZE") or 64 * 1024 * 1024))
+
+from .language import Language
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+__all__ = ("BatchHarness", )
+
+import json
+import secrets
+from dataclasses import dataclass
+from typing import ClassVar, Final, Optional, Sequence
+
+from .executor import Executor
+from .exception import PistonException
+from .result import ExecutionResult
+
+
+PYTHON_HARNESS: Final = '''\
+import json, os, signal, subprocess, sys
+
+boundary, case_timeout, solution_file = sys.argv[1], float(sys.argv[2]), sys.argv[3]
+inputs = json.load(sys.stdin)
+
+for index, case_input in enumerate(inputs):
+    # a fresh interpreter per case: the case is on its real stdin, with the usual argv,
+    # and the code can't see the other inputs or the boundary
+    process = subprocess.Popen(
+        [sys.executable, solution_file],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        start_new_session=True)
+    try:
+        output, _ = process.communicate(case_input.encode(), timeout=case_timeout)
+    except subprocess.TimeoutExpired:
+        output = None
+    finally:
+        # also kills whatever the case left running in the background
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    if output is None:
+        output, _ = process.communicate()
+        code, signal_name = None, "SIGKILL"
+    elif process.returncode < 0:
+        code, signal_name = None, signal.Signals(-process.returncode).name
+    else:
+        code, signal_name = process.returncode, None
+
+    result = [output.decode("utf-8", "replace"), code, signal_name]
+    sys.stdout.write(f"{boundary} {index} {json.dumps(result)}\\n")
+    sys.stdout.flush()
+'''
+
+
+@dataclass(frozen=True)
+class BatchHarness:
+    """
+    Runs a program against several inputs in a single Piston execution.
+    The harness is the entrypoint, it receives the inputs as a json list on stdin,
+    runs the user code (stored next to it as solution_file) in a new process per input,
+    the way a normal execution would, and prints how every run ended on its own line,
+    prefixed by a random boundary.
+    Only Python has a harness: it saves a Piston round trip per case, but starting the
+    interpreter is still paid for every case. Compiled languages aren't batched,
+    their harness would have to compile the user code on its own.
+    """
+    __harnesses: ClassVar[dict[str, BatchHarness]] = {}
+
+    # Piston's default limit for run_timeout
+    max_run_timeout: ClassVar[int] = 3000  # ms
+
+    source: str
+    solution_file: str
+    case_timeout: int = 1000  # ms
+
+    @classmethod
+    def register(cls, language_name: str, harness: BatchHarness):
+        cls.__harnesses[language_name] = harness
+
+    @classmethod
+    def get(cls, language_name: str) -> Optional[BatchHarness]:
+        """
+        Returns None if batching isn't supported for the language.
+        """
+        return cls.__harnesses.get(language_name)
+
+    async def run(self, executor: Executor, language: str, version: str,
+                  code: str, inputs: Sequence[str]) -> list[Optional[ExecutionResult]]:
+        """
+        Returns the result of every input, in order.
+        Inputs the batch didn't get to are None, all of them if Piston failed.
+        When the whole run got killed, the cases that ended before still count:
+        every case runs in its own process, their results don't depend on the others.
+        """
+        boundary = secrets.token_hex(16)
+        run_timeout = min(self.case_timeout * len(inputs) + 500, self.max_run_timeout)
+
+        try:
+            result = await executor.execute(
+                language, version, self.source, json.dumps(list(inputs)),
+                args=(boundary, str(self.case_timeout / 1000), self.solution_file),
+                run_timeout=run_timeout,
+                extra_files={self.solution_file: code})
+        except PistonException:
+            return [None] * len(inputs)
+
+        return self.parse(result.output, boundary, len(inputs))
+
+    @staticmethod
+    def parse(output: str, boundary: str, count: int) -> list[Optional[ExecutionResult]]:
+        results: list[Optional[ExecutionResult]] = [None] * count
+
+        # json.dumps escapes newlines and non ascii characters, so every case stays on one line
+        for line in output.split("\n"):
+            marker, _, line = line.partition(" ")
+            if marker != boundary:
+                continue
+
+            index, _, case_result = line.partition(" ")
+            try:
+                case_output, code, signal = json.loads(case_result)
+                results[int(index)] = ExecutionResult(case_output, code, signal)
+            except (ValueError, TypeError, IndexError):
+                continue
+
+        return results
+
+
+BatchHarness.register("python", BatchHarness(PYTHON_HARNESS, "solution.py"))
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+__all__ = ("ExecutionCache", )
+
+from hashlib import sha256
+from typing import Optional
+
+from ..cache import LRUCache
+
+
+class ExecutionCache(LRUCache[str, str]):
+    """
+    Outputs of already executed programs.
+    Puzzles are deterministic, so the same code, language and input always
+    produce the same output and don't need to run again.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: Optional[float] = None,
+                 max_size: Optional[int] = None):
+        super().__init__(max_entries, ttl, max_size, sizeof=self.entry_size)
+
+    @staticmethod
+    def entry_size(output: str) -> int:
+        # the key is a sha256 hex digest
+        return len(output.encode()) + 64
+
+    @staticmethod
+    def key(code: str, language: str, version: str, stdin: str) -> str:
+        digest = sha256()
+        for part in (code, language, version, stdin):
+            encoded = part.encode()
+            # length prefix, so that moving characters between parts changes the key
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+
+        return digest.hexdigest()
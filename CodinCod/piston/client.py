@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+__all__ = ("PistonClient", )
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Optional
+
+import aiohttp
+
+from .exception import PistonException
+from .result import ExecutionResult
+
+
+@dataclass
+class PistonClient:
+    """
+    Non-blocking client for the Piston API.
+    All requests share one pooled session, so connections to Piston are kept alive
+    and reused instead of being opened for every executed test case.
+    """
+    default_endpoint: ClassVar[str] = "https://emkc.org/api/v2/piston"
+
+    endpoint: str = default_endpoint
+    max_connections: int = 32
+    keepalive_timeout: float = 30  # secs
+    request_timeout: float = 15  # secs
+
+    _session: Optional[aiohttp.ClientSession] = field(init=False, default=None)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The session is created lazily, it has to be created from inside the running event loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _send(self, path: str, payload: Optional[dict[str, Any]] = None,
+                    timeout: Optional[float] = None) -> Any:
+        """
+        Sends a request to the configured endpoint.
+        Raises a PistonException if Piston can't be reached or answers with an error.
+        """
+        url = f"{self.endpoint.rstrip('/')}/{path}"
+        request_timeout = aiohttp.ClientTimeout(total=timeout or self.request_timeout)
+
+        try:
+            if payload is None:
+                request = self.session.get(url, timeout=request_timeout)
+            else:
+                request = self.session.post(url, json=payload, timeout=request_timeout)
+
+            async with request as response:
+                content = await response.json(content_type=None)
+
+        except asyncio.TimeoutError:
+            raise PistonException("Piston API: request timed out", status=504)
+        except (aiohttp.ClientError, ValueError) as error:
+            raise PistonException(f"Piston API: {error}", status=502)
+
+        if response.status != 200 or (type(content) is dict and content.keys() == {"message"}):
+            message = content.get("message") if type(content) is dict else None
+            # 4xx: Piston refused the request itself (unknown language, limits, ...)
+            status = 400 if 400 <= response.status < 500 else 502
+            raise PistonException(f"Piston API: {message or response.reason}", status=status)
+
+        return content
+
+    async def runtimes(self) -> dict[str, dict]:
+        return {item.pop("language"): item for item in await self._send("runtimes")}
+
+    async def execute(self, language: str, version: str, code: str, stdin: str = "",
+                      args: tuple[str, ...] = (), run_timeout: int = 3000,
+                      compile_timeout: int = 10000,
+                      extra_files: Optional[dict[str, str]] = None) -> ExecutionResult:
+        """
+        Runs the code and returns its output, or the compiler's if compiling failed.
+        extra_files (name => content) are placed next to the code, which stays the entrypoint.
+        Timeouts are in milliseconds, like the Piston API expects them;
+        the HTTP request itself is given enough time to cover both stages.
+        """
+        files = [{"content": code}]
+        if extra_files is not None:
+            files.extend({"name": name, "content": content} for name, content in extra_files.items())
+
+        result = await self._send(
+            "execute",
+            {
+                "language": language,
+                "version": version,
+                "files": files,
+                "stdin": stdin,
+                "args": list(args),
+                "run_timeout": run_timeout,
+                "compile_timeout": compile_timeout,
+            },
+            timeout=(run_timeout + compile_timeout) / 1000 + self.request_timeout)
+
+        stage = result["run"]
+        compile_stage = result.get("compile")
+        if compile_stage is not None and (compile_stage.get("code") or compile_stage.get("signal")):
+            stage = compile_stage
+
+        return ExecutionResult(stage["output"], stage.get("code"), stage.get("signal"))
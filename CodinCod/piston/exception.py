@@ -0,0 +1,9 @@
+__all__ = ("PistonException", "SchedulerException")
+
+from ..exceptions import CodinCodException
+
+class PistonException(CodinCodException):
+    pass
+
+class SchedulerException(CodinCodException):
+    pass
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+__all__ = ("Executor", )
+
+from typing import Any, Optional, Protocol
+
+from .result import ExecutionResult
+
+
+class Executor(Protocol):
+    """
+    Something that can run code, either Piston or a local replacement.
+    Errors are raised as PistonException, status < 500 meaning the request itself is invalid.
+    """
+
+    async def runtimes(self) -> dict[str, dict]:
+        """
+        The language catalog, name => {"version", "aliases", "runtime"},
+        the same shape as the Piston runtimes.
+        """
+        ...
+
+    def start(self):
+        """
+        Starts background work, called from inside the running event loop.
+        """
+        ...
+
+    async def close(self):
+        ...
+
+    async def execute(self, language: str, version: str, code: str, stdin: str = "",
+                      args: tuple[str, ...] = (), run_timeout: int = 3000,
+                      compile_timeout: int = 10000,
+                      extra_files: Optional[dict[str, str]] = None) -> ExecutionResult:
+        ...
+
+    def stats(self) -> dict[str, Any]:
+        ...
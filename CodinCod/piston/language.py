@@ -1,15 +1,33 @@
 from __future__ import annotations
-from typing import ClassVar
+
+import asyncio
+import json
+import logging
+import os
+from contextlib import suppress
+from typing import ClassVar, Optional
 from dataclasses import dataclass
 
-from . import piston
-from ..utils import static_init
+from . import executor, environment
+from .exception import PistonException
 
 
-@static_init
 @dataclass
 class Language:
+    """
+    The language catalog is loaded when the app starts, from a snapshot on disk when there is one,
+    so starting the app doesn't depend on the executor being reachable.
+    A background task refreshes it (and the snapshot) every refresh_interval secs.
+    """
+    snapshot_path: ClassVar[str] = environment.get("LANGUAGES_SNAPSHOT_PATH") or\
+        os.path.join(os.path.dirname(__file__), "languages.snapshot.json")
+    refresh_interval: ClassVar[float] = float(environment.get("LANGUAGES_REFRESH_INTERVAL") or 3600)  # secs
+
     __languages: ClassVar[dict[str, Language]] = {}
+    __aliases: ClassVar[dict[str, Language]] = {}
+    __serialized: ClassVar[bytes] = b"[]"
+    __loaded: ClassVar[bool] = False
+    __refresh_task: ClassVar[Optional[asyncio.Task]] = None
 
     name: str
     version: str
@@ -17,8 +35,12 @@ class Language:
     runtime: str
 
     @classmethod
-    def static_init(cls):
-        languages: dict[str, dict] = piston.languages
+    def load(cls, languages: dict[str, dict]):
+        """
+        Replaces the catalog, languages has the same shape as the Piston runtimes.
+        """
+        by_name: dict[str, Language] = {}
+        by_alias: dict[str, Language] = {}
 
         for lang_name, lang_infos in languages.items():
             lang_version = lang_infos["version"]
@@ -31,22 +53,116 @@ class Language:
                     type(lang_aliases) is list and
                     all(type(alias) is str
                         for alias in lang_aliases)):
-                raise TypeError("Piston API: wrong response type")
+                raise TypeError("Executor: wrong language catalog type")
 
             # Do we really want to allow all languages ?
             # There is probably rate limits
 
             language = cls(lang_name, lang_version, lang_aliases, lang_runtime)
-            cls.__languages[language.name] = language
+            by_name[language.name] = language
+            for alias in language.aliases:
+                by_alias.setdefault(alias, language)
+
+        cls.__languages = by_name
+        cls.__aliases = by_alias
+        cls.__serialized = json.dumps([language.as_dict() for language in by_name.values()]).encode()
+        cls.__loaded = True
+
+    @classmethod
+    async def load_catalog(cls):
+        """
+        Called when the app starts. Without a usable snapshot (only on the very first start)
+        the catalog is fetched from the executor; if that fails too, the periodic refresh retries.
+        """
+        try:
+            with open(cls.snapshot_path, encoding="utf-8") as file:
+                cls.load(json.load(file))
+            return
+
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            pass
+
+        try:
+            await cls.refresh()
+        except (PistonException, TypeError, KeyError, AttributeError) as error:
+            logging.warning(f"Couldn't load the language catalog: {error}")
 
     @classmethod
-    def get(cls, name: str):
-        return cls.__languages[name]
+    def ensure_loaded(cls):
+        if not cls.__loaded:
+            raise PistonException("The language catalog isn't loaded yet", status=503)
+
+    @classmethod
+    def write_snapshot(cls, languages: dict[str, dict]):
+        temporary_path = cls.snapshot_path + ".tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(languages, file)
+            os.replace(temporary_path, cls.snapshot_path)
+
+        except OSError as error:
+            logging.warning(f"Couldn't write the language snapshot: {error}")
+
+    @classmethod
+    async def refresh(cls):
+        languages = await executor.runtimes()
+        cls.load(languages)
+        await asyncio.to_thread(cls.write_snapshot, languages)
+
+    @classmethod
+    def start_refresh(cls):
+        """
+        Starts refreshing the catalog in the background, has to be called from inside the running event loop.
+        """
+        if cls.__refresh_task is None or cls.__refresh_task.done():
+            cls.__refresh_task = asyncio.create_task(cls.__refresh_periodically())
+
+    @classmethod
+    async def stop_refresh(cls):
+        if cls.__refresh_task is not None:
+            cls.__refresh_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await cls.__refresh_task
+            cls.__refresh_task = None
+
+    @classmethod
+    async def __refresh_periodically(cls):
+        while True:
+            try:
+                await cls.refresh()
+            except (PistonException, TypeError, KeyError, AttributeError) as error:
+                logging.warning(f"Couldn't refresh the language catalog: {error}")
+
+            await asyncio.sleep(cls.refresh_interval)
+
+    @classmethod
+    def get(cls, name: str) -> Language:
+        """
+        Finds a language by name or alias.
+        Raises a KeyError if there is no such language,
+        a PistonException if the catalog isn't loaded yet.
+        """
+        cls.ensure_loaded()
+
+        language = cls.__languages.get(name) or cls.__aliases.get(name)
+        if language is None:
+            raise KeyError(name)
+
+        return language
 
     @classmethod
     def all(cls):
+        cls.ensure_loaded()
         return tuple(language.as_dict() for language in cls.__languages.values())
 
+    @classmethod
+    def serialized(cls) -> bytes:
+        """
+        The json encoded catalog, as returned by all().
+        """
+        cls.ensure_loaded()
+        return cls.__serialized
+
     def as_dict(self):
         return {
             "name": self.name,
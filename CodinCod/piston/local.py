@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+__all__ = ("LocalExecutor", "LocalLanguage")
+
+import asyncio
+import os
+import platform
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import Any, Final, Iterable, Optional
+
+from .exception import PistonException
+from .result import ExecutionResult
+
+
+@dataclass(frozen=True)
+class LocalLanguage:
+    name: str
+    aliases: tuple[str, ...]
+    file_name: str
+    run: tuple[str, ...]
+    compile: Optional[tuple[str, ...]] = None
+    version: str = ""
+
+    @property
+    def binary(self) -> str:
+        return (self.compile or self.run)[0]
+
+    def detect_version(self) -> str:
+        """
+        First version number printed by `<binary> --version`.
+        """
+        try:
+            result = subprocess.run([self.binary, "--version"], capture_output=True, text=True, timeout=5)
+        except (OSError, subprocess.SubprocessError):
+            return "0.0.0"
+
+        version = re.search(r"\d+(\.\d+)+", result.stdout + result.stderr)
+        return version.group() if version is not None else "0.0.0"
+
+
+# sets the limits, then becomes the program: the server is multithreaded (motor, to_thread),
+# running python between fork and exec (preexec_fn) could deadlock the child
+LIMITS_LAUNCHER: Final = '''\
+import os, resource, sys
+cpu_seconds, memory_limit, file_size_limit = map(int, sys.argv[1:4])
+resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+resource.setrlimit(resource.RLIMIT_DATA, (memory_limit, memory_limit))
+resource.setrlimit(resource.RLIMIT_FSIZE, (file_size_limit, file_size_limit))
+resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+try:
+    os.execvp(sys.argv[4], sys.argv[4:])
+except OSError as error:
+    print(error, file=sys.stderr)
+    sys.exit(127)
+'''
+
+
+# the names and aliases match the Piston runtimes
+DEFAULT_LANGUAGES: tuple[LocalLanguage, ...] = (
+    LocalLanguage("python", ("py", "py3", "python3"), "main.py", (sys.executable, "main.py"),
+                  version=platform.python_version()),
+    LocalLanguage("javascript", ("node-javascript", "node-js", "js"), "main.js", ("node", "main.js")),
+    LocalLanguage("bash", ("sh", ), "main.sh", ("bash", "main.sh")),
+    LocalLanguage("c", ("gcc", ), "main.c", ("./main", ),
+                  compile=("gcc", "-O2", "-o", "main", "main.c", "-lm")),
+    LocalLanguage("c++", ("cpp", "g++"), "main.cpp", ("./main", ),
+                  compile=("g++", "-O2", "-o", "main", "main.cpp")),
+)
+
+
+@dataclass
+class LocalExecutor:
+    """
+    Runs code in local subprocesses instead of Piston.
+    Every run gets its own temporary working directory, a fresh process group,
+    resource limits (memory, cpu time, file size, open files) and a wall clock timeout.
+    Meant for benchmarks and small deployments, this is NOT a sandbox like Piston's isolate.
+    """
+    language_names: Optional[Iterable[str]] = None  # None => every installed default language
+    max_processes: int = 8
+    memory_limit: int = 512 * 1024 * 1024  # bytes
+    file_size_limit: int = 16 * 1024 * 1024  # bytes
+    max_output: int = 1024 * 1024  # bytes
+
+    _languages: dict[str, LocalLanguage] = field(init=False, default_factory=dict)
+    _semaphore: asyncio.Semaphore = field(init=False)
+    _running: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        wanted = None if self.language_names is None else set(self.language_names)
+
+        for language in DEFAULT_LANGUAGES:
+            if wanted is not None and language.name not in wanted:
+                continue
+            if not os.path.isabs(language.binary) and shutil.which(language.binary) is None:
+                continue
+
+            version = language.version or language.detect_version()
+            self._languages[language.name] = LocalLanguage(
+                language.name, language.aliases, language.file_name,
+                language.run, language.compile, version)
+
+        self._semaphore = asyncio.Semaphore(self.max_processes)
+
+    @property
+    def languages(self) -> dict[str, dict]:
+        return {
+            language.name: {
+                "version": language.version,
+                "aliases": list(language.aliases),
+                "runtime": "",
+            }
+            for language in self._languages.values()
+        }
+
+    def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def runtimes(self) -> dict[str, dict]:
+        return self.languages
+
+    async def execute(self, language: str, version: str, code: str, stdin: str = "",
+                      args: tuple[str, ...] = (), run_timeout: int = 3000,
+                      compile_timeout: int = 10000,
+                      extra_files: Optional[dict[str, str]] = None) -> ExecutionResult:
+        """
+        Same as PistonClient.execute.
+        """
+        local_language = self._languages.get(language)
+        if local_language is None or version not in (local_language.version, "*"):
+            raise PistonException(f"Local executor: runtime {language}-{version} is unknown", status=400)
+
+        async with self._semaphore:
+            self._running += 1
+            try:
+                with tempfile.TemporaryDirectory(prefix="codincod-") as directory:
+                    files = {local_language.file_name: code, **(extra_files or {})}
+                    for name, content in files.items():
+                        path = os.path.join(directory, os.path.basename(name))
+                        with open(path, "w", encoding="utf-8") as file:
+                            file.write(content)
+
+                    if local_language.compile is not None:
+                        result = await self._run(local_language.compile, directory, "", compile_timeout)
+                        if not result.exited or result.code:
+                            return result
+
+                    return await self._run(local_language.run + tuple(args), directory, stdin, run_timeout)
+
+            except OSError as error:
+                raise PistonException(f"Local executor: {error}", status=502)
+
+            finally:
+                self._running -= 1
+
+    def _limited(self, command: tuple[str, ...], timeout: int) -> tuple[str, ...]:
+        """
+        The command, started through the limits launcher.
+        Memory is limited with RLIMIT_DATA, not RLIMIT_AS: V8 and the JVM reserve far more
+        address space than they ever use, RLIMIT_DATA only counts the memory that can be written to.
+        """
+        cpu_seconds = timeout // 1000 + 1
+        return (sys.executable, "-S", "-c", LIMITS_LAUNCHER,
+                str(cpu_seconds), str(self.memory_limit), str(self.file_size_limit), *command)
+
+    async def _run(self, command: tuple[str, ...], directory: str,
+                   stdin: str, timeout: int) -> ExecutionResult:
+        """
+        Returns the combined stdout/stderr (truncated to max_output) and how the process ended,
+        like Piston a process killed because of the timeout ends with SIGKILL.
+        """
+        process = await asyncio.create_subprocess_exec(
+            *self._limited(command, timeout),
+            cwd=directory,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            env={"PATH": os.environ.get("PATH", ""), "HOME": directory, "LANG": "C.UTF-8"},
+            start_new_session=True)
+
+        output = bytearray()
+
+        async def communicate():
+            assert process.stdin is not None and process.stdout is not None
+            with suppress(BrokenPipeError, ConnectionResetError):
+                process.stdin.write(stdin.encode())
+                await process.stdin.drain()
+                process.stdin.close()
+
+            # keeps reading past max_output, so the process never blocks on a full pipe
+            while chunk := await process.stdout.read(64 * 1024):
+                output.extend(chunk[:self.max_output - len(output)])
+
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(communicate(), timeout / 1000)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            exit_code = process.returncode
+            # also kills whatever the program left running in the background
+            with suppress(ProcessLookupError):
+                os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+
+        output_text = output.decode("utf-8", "replace")
+        if exit_code is None:
+            return ExecutionResult(output_text, signal=signal.SIGKILL.name)
+        if exit_code < 0:
+            return ExecutionResult(output_text, signal=signal.Signals(-exit_code).name)
+        return ExecutionResult(output_text, exit_code)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._running,
+            "languages": list(self._languages),
+        }
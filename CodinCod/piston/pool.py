@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+__all__ = ("PistonPool", "PistonBackend")
+
+import asyncio
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Optional
+
+from .client import PistonClient
+from .exception import PistonException
+from .result import ExecutionResult
+
+
+@dataclass(eq=False)
+class PistonBackend:
+    client: PistonClient
+
+    outstanding: int = 0
+    healthy: bool = True
+    # consecutive failures, reset by any success
+    failures: int = 0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=256))  # secs
+
+    @property
+    def endpoint(self) -> str:
+        return self.client.endpoint
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+
+        latencies = sorted(self.latencies)
+        return latencies[round(percentile * (len(latencies) - 1))]
+
+
+@dataclass
+class PistonPool:
+    """
+    Spreads executions over several Piston instances.
+    Requests go to the healthy backend with the least outstanding requests,
+    and are retried on another backend when one fails.
+    Backends failing max_failures times in a row are ejected until a health check passes.
+    With hedge_percentile set, a request taking longer than that latency percentile
+    of its backend is duplicated on a second backend, the first answer wins.
+    """
+    endpoints: list[str]
+    health_check_interval: float = 10  # secs
+    max_failures: int = 3
+    hedge_percentile: Optional[float] = None
+    # latencies a backend needs before hedging its requests
+    hedge_min_samples: int = 20
+
+    backends: list[PistonBackend] = field(init=False)
+    hedged: int = field(init=False, default=0)
+    _health_task: Optional[asyncio.Task] = field(init=False, default=None)
+
+    def __post_init__(self):
+        if not self.endpoints:
+            raise ValueError("PistonPool needs at least one endpoint")
+
+        self.backends = [PistonBackend(PistonClient(endpoint)) for endpoint in self.endpoints]
+
+    def start(self):
+        """
+        Starts the periodic health checks, has to be called from inside the running event loop.
+        """
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_checks())
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._health_task
+            self._health_task = None
+
+        for backend in self.backends:
+            await backend.client.close()
+
+    async def _health_checks(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await asyncio.gather(*(self._health_check(backend) for backend in self.backends))
+
+    async def _health_check(self, backend: PistonBackend):
+        try:
+            await backend.client.runtimes()
+        except PistonException:
+            self._failed(backend)
+        else:
+            backend.failures = 0
+            backend.healthy = True
+
+    def _failed(self, backend: PistonBackend):
+        backend.failures += 1
+        if backend.failures >= self.max_failures:
+            backend.healthy = False
+
+    def _pick(self, exclude: set[PistonBackend]) -> Optional[PistonBackend]:
+        candidates = [backend for backend in self.backends if backend not in exclude]
+        # when every backend got ejected, trying one anyway beats failing right away
+        healthy = [backend for backend in candidates if backend.healthy] or candidates
+        return min(healthy, key=lambda backend: backend.outstanding, default=None)
+
+    async def runtimes(self) -> dict[str, dict]:
+        return await self._request(lambda client: client.runtimes())
+
+    async def execute(self, language: str, version: str, code: str, stdin: str = "",
+                      args: tuple[str, ...] = (), run_timeout: int = 3000,
+                      compile_timeout: int = 10000,
+                      extra_files: Optional[dict[str, str]] = None) -> ExecutionResult:
+        """
+        Same as PistonClient.execute, on the best available backend.
+        """
+        return await self._request(lambda client: client.execute(
+            language, version, code, stdin, args, run_timeout, compile_timeout, extra_files))
+
+    async def _request(self, request) -> Any:
+        tried: set[PistonBackend] = set()
+        error = PistonException("Piston API: no backend available", status=503)
+
+        while (backend := self._pick(tried)) is not None:
+            try:
+                return await self._hedged(backend, tried, request)
+
+            except PistonException as exception:
+                # the request itself is invalid, no backend will accept it
+                if exception.status < 500:
+                    raise
+                error = exception
+
+        raise error
+
+    async def _hedged(self, backend: PistonBackend, tried: set[PistonBackend], request) -> Any:
+        tried.add(backend)
+        first = self._send(backend, request)
+
+        delay = None
+        if self.hedge_percentile is not None and len(backend.latencies) >= self.hedge_min_samples:
+            delay = backend.latency_percentile(self.hedge_percentile)
+
+        tasks = {first}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                second_backend = None if done else self._pick(tried)
+
+                if second_backend is not None:
+                    tried.add(second_backend)
+                    tasks.add(self._send(second_backend, request))
+                    self.hedged += 1
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+
+            assert error is not None
+            raise error
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _send(self, backend: PistonBackend, request) -> asyncio.Task:
+        """
+        Outstanding requests are counted right away, so concurrent picks see them.
+        """
+        backend.outstanding += 1
+
+        def done(task: asyncio.Task):
+            backend.outstanding -= 1
+
+        task = asyncio.create_task(self._timed(backend, request))
+        task.add_done_callback(done)
+        return task
+
+    async def _timed(self, backend: PistonBackend, request) -> Any:
+        started_at = monotonic()
+        try:
+            result = await request(backend.client)
+
+        except PistonException as exception:
+            if exception.status >= 500:
+                self._failed(backend)
+            raise
+
+        backend.latencies.append(monotonic() - started_at)
+        backend.failures = 0
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hedged": self.hedged,
+            "backends": [
+                {
+                    "endpoint": backend.endpoint,
+                    "healthy": backend.healthy,
+                    "outstanding": backend.outstanding,
+                    "failures": backend.failures,
+                    "latency_p50": backend.latency_percentile(0.5),
+                    "latency_p95": backend.latency_percentile(0.95),
+                }
+                for backend in self.backends
+            ]
+        }
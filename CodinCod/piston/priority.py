@@ -0,0 +1,8 @@
+from __future__ import annotations
+from enum import Enum
+
+
+class Priority(Enum):
+    # lower value => served first
+    INTERACTIVE = 0
+    JUDGING = 1
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+__all__ = ("ExecutionResult", )
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ExecutionResult:
+    """
+    What a program printed (stdout and stderr combined) and how it ended.
+    """
+    output: str
+    # None if the program didn't exit by itself
+    code: Optional[int] = None
+    # the signal that killed it, e.g. SIGKILL after a timeout or the memory limit
+    signal: Optional[str] = None
+
+    @property
+    def exited(self) -> bool:
+        """
+        The program ran to its end: the output doesn't depend on how loaded the executor was,
+        unlike the output of a program killed halfway.
+        """
+        return self.signal is None and self.code is not None
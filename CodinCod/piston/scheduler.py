@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+__all__ = ("ExecutionScheduler", )
+
+import asyncio
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from bson.objectid import ObjectId
+
+from .priority import Priority
+from .exception import SchedulerException
+
+T = TypeVar("T")
+
+
+@dataclass(eq=False)
+class _Job:
+    priority: Priority
+    language: str
+    user_id: Optional[ObjectId]
+    queued_at: float
+    granted: asyncio.Future[None]
+
+
+@dataclass
+class _LaneStats:
+    started: int = 0
+    rejected: int = 0
+    total_wait: float = 0.0  # secs
+    max_wait: float = 0.0  # secs
+
+
+@dataclass
+class ExecutionScheduler:
+    """
+    Queues code executions in front of Piston.
+    Jobs are started by priority lane (interactive test runs before submission judging),
+    as long as the global, per-language and per-user limits allow it.
+    A full lane rejects new jobs right away instead of letting them pile up.
+    """
+    max_running: int = 16
+    max_queued: int = 256  # per lane
+    language_quota: int = 8
+    user_quota: int = 4
+
+    _lanes: dict[Priority, deque[_Job]] = field(init=False)
+    _stats: dict[Priority, _LaneStats] = field(init=False)
+    _running: int = field(init=False, default=0)
+    _running_languages: Counter[str] = field(init=False, default_factory=Counter)
+    _running_users: Counter[ObjectId] = field(init=False, default_factory=Counter)
+
+    def __post_init__(self):
+        priorities = sorted(Priority, key=lambda priority: priority.value)
+        self._lanes = {priority: deque() for priority in priorities}
+        self._stats = {priority: _LaneStats() for priority in priorities}
+
+    async def run(self, job: Callable[[], Awaitable[T]], *, priority: Priority,
+                  language: str, user_id: Optional[ObjectId] = None) -> T:
+        """
+        Waits for a free execution slot, then runs the job in it.
+        Raises a SchedulerException if the lane of the job is full.
+        """
+        ticket = self._enqueue(priority, language, user_id)
+
+        try:
+            await ticket.granted
+        except asyncio.CancelledError:
+            if ticket.granted.done() and not ticket.granted.cancelled():
+                self._release(ticket)
+            elif ticket in self._lanes[priority]:
+                self._lanes[priority].remove(ticket)
+            raise
+
+        try:
+            return await job()
+        finally:
+            self._release(ticket)
+
+    def _enqueue(self, priority: Priority, language: str, user_id: Optional[ObjectId]) -> _Job:
+        lane = self._lanes[priority]
+        if len(lane) >= self.max_queued:
+            self._stats[priority].rejected += 1
+            raise SchedulerException("Too many programs are waiting to be executed, try again later", status=503)
+
+        ticket = _Job(priority, language, user_id, monotonic(), asyncio.get_running_loop().create_future())
+        lane.append(ticket)
+        self._dispatch()
+        return ticket
+
+    def _can_start(self, job: _Job) -> bool:
+        if self._running_languages[job.language] >= self.language_quota:
+            return False
+
+        return job.user_id is None or self._running_users[job.user_id] < self.user_quota
+
+    def _dispatch(self):
+        """
+        Starts queued jobs while there are free slots.
+        Jobs blocked by a quota are skipped, so they don't hold back the rest of their lane.
+        """
+        for priority, lane in self._lanes.items():
+            for job in tuple(lane):
+                if self._running >= self.max_running:
+                    return
+
+                # cancelled while waiting
+                if job.granted.done():
+                    lane.remove(job)
+                    continue
+
+                if not self._can_start(job):
+                    continue
+
+                lane.remove(job)
+                self._start(job)
+
+    def _start(self, job: _Job):
+        self._running += 1
+        self._running_languages[job.language] += 1
+        if job.user_id is not None:
+            self._running_users[job.user_id] += 1
+
+        wait = monotonic() - job.queued_at
+        stats = self._stats[job.priority]
+        stats.started += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+
+        job.granted.set_result(None)
+
+    def _release(self, job: _Job):
+        self._running -= 1
+        self._running_languages[job.language] -= 1
+        if not self._running_languages[job.language]:
+            del self._running_languages[job.language]
+
+        if job.user_id is not None:
+            self._running_users[job.user_id] -= 1
+            if not self._running_users[job.user_id]:
+                del self._running_users[job.user_id]
+
+        self._dispatch()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Queue depth and wait time (in secs) of every lane.
+        """
+        lanes = {}
+        for priority, lane in self._lanes.items():
+            stats = self._stats[priority]
+            lanes[priority.name] = {
+                "queued": len(lane),
+                "started": stats.started,
+                "rejected": stats.rejected,
+                "average_wait": stats.total_wait / stats.started if stats.started else 0.0,
+                "max_wait": stats.max_wait,
+                "oldest_wait": monotonic() - lane[0].queued_at if lane else 0.0,
+            }
+
+        return {
+            "running": self._running,
+            "running_languages": dict(self._running_languages),
+            "lanes": lanes,
+        }
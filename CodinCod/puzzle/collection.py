@@ -1,5 +1,4 @@
-import pymongo
-from ..database import db_client
+from ..database import db_client, register_index
 
 puzzles_collection = db_client.get_collection("PUZZLES")
-puzzles_collection.create_index("title", unique=True)
\ No newline at end of file
+register_index(puzzles_collection, "title", unique=True)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
-from typing import cast, Any
+from typing import cast, Any, ClassVar, Final, Optional
 
 from bson.objectid import ObjectId
 from pymongo.errors import DuplicateKeyError
@@ -9,10 +10,22 @@ from pymongo.errors import DuplicateKeyError
 from . import PuzzleType, PuzzleDifficulty, puzzles_collection
 from .exception import PuzzleCreationException, PuzzleFindException, TestCaseFindException
 from .validator import Validator, ValidatorType
-from ..piston import piston, Language
+from ..piston import Language
+from ..cache import LRUCache, SingleFlight
+from ..environment_variables import load_dotenv
+
+environment: Final = load_dotenv()
+
 
 @dataclass(eq=False, kw_only=True)
 class Puzzle:
+    # puzzles don't change during a game, so hot puzzles are served from memory
+    __cache: ClassVar[LRUCache[ObjectId, Puzzle]] = LRUCache(
+        max_entries = int(environment.get("PUZZLE_CACHE_MAX_ENTRIES") or 256),
+        ttl = float(environment.get("PUZZLE_CACHE_TTL") or 600))
+    # pending loads, so concurrent misses for the same puzzle share one query
+    __loading: ClassVar[SingleFlight[ObjectId, Puzzle]] = SingleFlight()
+
     _id: ObjectId
     title: str
     statement: str
@@ -35,11 +48,11 @@ class Puzzle:
         return tuple(validator for validator in self.validators if validator.type is ValidatorType.TESTCASE)
 
     @classmethod
-    def create(cls, title: str, statement: str, constraints: str, validators: list[Validator],
+    async def create(cls, title: str, statement: str, constraints: str, validators: list[Validator],
                 puzzle_types: list[PuzzleType], author_id: ObjectId) -> Puzzle:
 
         try:
-            result = puzzles_collection.insert_one(
+            result = await puzzles_collection.insert_one(
                 {
                     "title": title,
                     "statement": statement,
@@ -63,7 +76,7 @@ class Puzzle:
 
             raise PuzzleCreationException(error_message)
 
-        return cls.get_by_id(result.inserted_id)
+        return await cls.get_by_id(result.inserted_id)
 
     @classmethod
     def from_dict(cls, info: dict) -> Puzzle:
@@ -73,31 +86,68 @@ class Puzzle:
             statement = info["statement"],
             constraints = info["constraints"],
             author_id = info["author_id"],
-            validators = info["validators"],
+            validators = [Validator.from_dict(validator)
+                for validator in info["validators"]],
             puzzle_types = [PuzzleType[puzzle_type]
                 for puzzle_type in info["puzzle_types"]])
 
     @classmethod
-    def get_by_id(cls, puzzle_id: ObjectId) -> Puzzle:
-        puzzle_info = cls.get_puzzle_info_from_db(puzzle_id)
-        return Puzzle.from_dict(puzzle_info)
+    async def get_by_id(cls, puzzle_id: ObjectId) -> Puzzle:
+        puzzle = cls.__cache.get(puzzle_id)
+        if puzzle is not None:
+            return puzzle
+
+        return await cls.__loading.load(puzzle_id, cls._load)
+
+    @classmethod
+    async def _load(cls, puzzle_id: ObjectId) -> Puzzle:
+        puzzle = Puzzle.from_dict(await cls.get_puzzle_info_from_db(puzzle_id))
+        cls.__cache.set(puzzle_id, puzzle)
+        return puzzle
+
+    @classmethod
+    def invalidate(cls, puzzle_id: ObjectId):
+        """
+        Drops the cached puzzle, the next get_by_id loads it from the db again.
+        """
+        cls.__cache.invalidate(puzzle_id)
+
+    @classmethod
+    def cache_stats(cls) -> dict[str, Any]:
+        return cls.__cache.stats()
 
     @classmethod
-    def get_puzzle_info_from_db(cls, puzzle_id: ObjectId) -> dict[str, Any]:
-        info = puzzles_collection.find_one({"_id": puzzle_id})
+    async def get_puzzle_info_from_db(cls, puzzle_id: ObjectId) -> dict[str, Any]:
+        info = await puzzles_collection.find_one({"_id": puzzle_id})
         if info is None:
             raise PuzzleFindException("Can't find puzzle")
 
         return cast(dict[str, Any], info)
 
+    async def update(self):
+        """
+        Writes the puzzle to the db and drops the cached copy.
+        """
+        await puzzles_collection.update_one(
+            {"_id": self.id},
+            {"$set": {
+                "title": self.title,
+                "statement": self.statement,
+                "constraints": self.constraints,
+                "validators": [validator.as_dict() for validator in self.validators],
+                "puzzle_types": [puzzle_type.name for puzzle_type in self.puzzle_types],
+            }}
+        )
+        Puzzle.invalidate(self.id)
+
     @classmethod
-    def get_by_author(cls, author_id: ObjectId) -> tuple[Puzzle, ...]:
+    async def get_by_author(cls, author_id: ObjectId) -> tuple[Puzzle, ...]:
         cursor = puzzles_collection.find(
             {"author_id": author_id})
-        return tuple(map(Puzzle.from_dict, cursor))
+        return tuple(map(Puzzle.from_dict, await cursor.to_list(None)))
 
     @classmethod
-    def get_by_type(cls, puzzle_type: PuzzleType) -> Puzzle:
+    async def get_by_type(cls, puzzle_type: PuzzleType) -> Puzzle:
         """
         raises an error if there is no puzzles of that type
         """
@@ -118,7 +168,7 @@ class Puzzle:
             },
         ]
         cursor = puzzles_collection.aggregate(pipeline)
-        return Puzzle.from_dict(cursor.next())
+        return Puzzle.from_dict(await cursor.next())
 
     def as_dict(self) -> dict:
         """
@@ -137,9 +187,12 @@ class Puzzle:
             "test_cases": self.test_cases,
         }
     
-    async def run_testcase(self, test_case_id: int, code: str, language: Language) -> tuple[bool, str]:
+    async def run_testcase(self, test_case_id: int, code: str, language: Language,
+                           user_id: Optional[ObjectId] = None) -> tuple[bool, str]:
         try:
-            return await self.test_cases[test_case_id].execute(code, language)
+            test_case = self.test_cases[test_case_id]
 
         except IndexError:
             raise TestCaseFindException("Can't find test case in puzzle!")
+
+        return await test_case.execute(code, language, user_id = user_id)
@@ -1,10 +1,14 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from bson.objectid import ObjectId
 
-from ..piston import piston, Language
+from ..piston import executor, execution_scheduler, execution_cache, Language, Priority, BatchHarness, PistonException
+from ..piston import ExecutionResult
 
 from .validator_type import ValidatorType
-from ..piston.language import Language
-from pistonapi.exceptions import PistonError
 
 @dataclass
 class Validator:
@@ -12,20 +16,85 @@ class Validator:
     input: str
     output: str
 
-    async def execute(self, code: str, language: Language, retry_limit: int = 2) -> tuple[bool, str]:
-        # TODO: this function is blocking, so everything will stop working until the code finishes executing!!
-        # pistonapi library in itself is blocking we need to use threads or change pistonapi.
-        lang = language.name
-        version = language.version
-        for _ in range(retry_limit):
-            try:
-                output: str = piston.execute(
-                    lang, version, code, self.input, timeout = 1000)
-                return output.rstrip() == self.output.rstrip(), output
-            except PistonError:
-                continue
-
-        return (False, "Internal error")
+    @classmethod
+    def from_dict(cls, info: dict) -> Validator:
+        return cls(
+            type = ValidatorType(info["validator_type"]),
+            input = info["input"],
+            output = info["output"])
+
+    async def execute(self, code: str, language: Language, *,
+                      priority: Priority = Priority.INTERACTIVE,
+                      user_id: Optional[ObjectId] = None) -> tuple[bool, str]:
+        """
+        Runs the code against this validator through the execution scheduler,
+        unless the output of that exact run is already cached.
+        Only runs that ended by themselves are cached, one killed because of a timeout
+        or the memory limit may pass once the executor is less loaded.
+        Raises a SchedulerException if the execution queue is full.
+        """
+        key = execution_cache.key(code, language.name, language.version, self.input)
+        output = execution_cache.get(key)
+
+        if output is None:
+            result = await execution_scheduler.run(
+                lambda: self.run(code, language),
+                priority = priority, language = language.name, user_id = user_id)
+
+            if result is None:
+                return (False, "Internal error")
+
+            output = result.output
+            if result.exited:
+                execution_cache.set(key, output)
+
+        return output.rstrip() == self.output.rstrip(), output
+
+    @classmethod
+    async def execute_batch(cls, validators: Sequence[Validator], code: str, language: Language, *,
+                            priority: Priority = Priority.JUDGING,
+                            user_id: Optional[ObjectId] = None) -> list[Optional[tuple[bool, str]]]:
+        """
+        Runs the code against all validators in a single Piston execution,
+        using the batch harness of the language.
+        Validators without a result (batching isn't supported for the language,
+        the batch didn't get to them, or their run got killed) are None and have to be executed on their own.
+        """
+        keys = [execution_cache.key(code, language.name, language.version, validator.input)
+                for validator in validators]
+        outputs = [execution_cache.get(key) for key in keys]
+
+        missing = [index for index, output in enumerate(outputs) if output is None]
+        harness = BatchHarness.get(language.name)
+
+        # a batch of one is just a normal execution
+        if harness is not None and len(missing) > 1:
+            batch_results = await execution_scheduler.run(
+                lambda: harness.run(executor, language.name, language.version, code,
+                                    [validators[index].input for index in missing]),
+                priority = priority, language = language.name, user_id = user_id)
+
+            for index, result in zip(missing, batch_results):
+                # a case killed in the batch may pass on its own, with the executor to itself
+                if result is None or not result.exited:
+                    continue
+
+                execution_cache.set(keys[index], result.output)
+                outputs[index] = result.output
+
+        return [None if output is None else (output.rstrip() == validator.output.rstrip(), output)
+                for validator, output in zip(validators, outputs)]
+
+    async def run(self, code: str, language: Language) -> Optional[ExecutionResult]:
+        """
+        Executes the code with this validator's input.
+        Returns None if the executor couldn't run it.
+        """
+        try:
+            return await executor.execute(
+                language.name, language.version, code, self.input, run_timeout = 1000)
+        except PistonException:
+            return None
 
     def as_dict(self) -> dict:
         """
@@ -1,4 +1,29 @@
+__all__ = ("SessionException", "MessageType", "Message", "Codec", "OverflowPolicy", "Session", "Hub", "hub",
+           "SessionRegistry", "session_registry", "Heartbeat", "heartbeat",
+           "EventLog", "Resumption", "resumption")
+
+from typing import Final
+
 from .expection import SessionException
 from .message_type import MessageType
 from .message import Message
-from .session import Session
\ No newline at end of file
+from .codec import Codec
+from .overflow_policy import OverflowPolicy
+from .session import Session
+from .hub import Hub
+from .registry import SessionRegistry
+from .heartbeat import Heartbeat
+from .event_log import EventLog
+from .resume import Resumption
+from ..environment_variables import load_dotenv
+
+environment: Final = load_dotenv()
+
+hub: Final = Hub()
+session_registry: Final = SessionRegistry()
+heartbeat: Final = Heartbeat(
+    session_registry,
+    interval = float(environment.get("SESSION_PING_INTERVAL") or 15),
+    timeout = float(environment.get("SESSION_IDLE_TIMEOUT") or 45))
+resumption: Final = Resumption(
+    grace_period = float(environment.get("SESSION_RESUME_GRACE_PERIOD") or 30))
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+__all__ = ("Codec", "JSON_CODEC", "MSGPACK_CODEC")
+
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Final, Optional
+
+import msgspec
+from bson.objectid import ObjectId
+
+from . import Message, MessageType
+from .expection import InvalidMessageException
+
+
+class _Frame(msgspec.Struct, forbid_unknown_fields=True, omit_defaults=True):
+    """
+    Wire format of a message, decoding validates it in one pass:
+    type and content are required, type has to be one of the MessageType values.
+    """
+    type: MessageType
+    content: Any
+    seq: Optional[int] = None
+
+
+def _encode_hook(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise NotImplementedError(f"Can't encode {type(value).__name__}")
+
+
+@dataclass(frozen=True)
+class Codec:
+    """
+    How messages are encoded on a websocket, negotiated at connect through the websocket subprotocol.
+    Clients that don't ask for one get JSON.
+    """
+    __codecs: ClassVar[dict[str, Codec]] = {}
+
+    # the websocket subprotocol
+    name: str
+    # binary or text frames
+    binary: bool
+
+    _encoder: Any = field(repr=False)
+    _decoder: Any = field(repr=False)
+
+    @classmethod
+    def register(cls, codec: Codec):
+        cls.__codecs[codec.name] = codec
+
+    @classmethod
+    def subprotocols(cls) -> tuple[str, ...]:
+        return tuple(cls.__codecs)
+
+    @classmethod
+    def negotiate(cls, subprotocol: Optional[str]) -> Codec:
+        if subprotocol is None:
+            return JSON_CODEC
+        return cls.__codecs.get(subprotocol, JSON_CODEC)
+
+    def encode(self, message: Message) -> str | bytes:
+        frame = self._encoder.encode(_Frame(message.type, message.content, message.seq))
+        return frame if self.binary else frame.decode()
+
+    def decode(self, frame: str | bytes) -> Message:
+        try:
+            decoded = self._decoder.decode(frame)
+        # TypeError: a text frame on a binary codec
+        except (msgspec.DecodeError, TypeError, ValueError) as error:
+            raise InvalidMessageException(f"Recieved an Invalid message: {error}")
+
+        return Message(decoded.type, decoded.content, decoded.seq)
+
+
+JSON_CODEC: Final = Codec(
+    "codincod.json", False,
+    msgspec.json.Encoder(enc_hook=_encode_hook), msgspec.json.Decoder(_Frame))
+MSGPACK_CODEC: Final = Codec(
+    "codincod.msgpack", True,
+    msgspec.msgpack.Encoder(enc_hook=_encode_hook), msgspec.msgpack.Decoder(_Frame))
+
+Codec.register(JSON_CODEC)
+Codec.register(MSGPACK_CODEC)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+__all__ = ("EventLog", )
+
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Optional
+
+from .message import Message
+
+
+@dataclass
+class EventLog:
+    """
+    The last max_events messages published on a topic, numbered in order.
+    Lets reconnecting clients catch up on what they missed.
+    """
+    max_events: int = 256
+
+    last_seq: int = field(init=False, default=0)
+    _events: deque[Message] = field(init=False)
+
+    def __post_init__(self):
+        self._events = deque(maxlen=self.max_events)
+
+    def append(self, message: Message) -> Message:
+        self.last_seq += 1
+        message.seq = self.last_seq
+        self._events.append(message)
+        return message
+
+    def since(self, seq: int) -> Optional[list[Message]]:
+        """
+        Messages numbered after seq, None if some of them were already dropped.
+        Also None for a seq this log never reached: the numbering started over,
+        e.g. the game room got loaded again.
+        """
+        if seq > self.last_seq:
+            return None
+        if seq == self.last_seq:
+            return []
+
+        first_seq = self.last_seq - len(self._events) + 1
+        if seq + 1 < first_seq:
+            return None
+
+        return list(islice(self._events, seq + 1 - first_seq, None))
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+__all__ = ("Heartbeat", )
+
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Optional
+
+from .codec import Codec
+from .message import Message
+from .message_type import MessageType
+from .registry import SessionRegistry
+from ..timer import timer, TimerHandle
+
+
+@dataclass
+class Heartbeat:
+    """
+    Keeps track of idle connections with a single sweep every interval,
+    instead of a ping task per socket.
+    Sessions quiet for an interval are sent a ping, clients answer with a pong;
+    sessions that didn't send anything for timeout are disconnected.
+    """
+    registry: SessionRegistry
+    interval: float = 15  # secs
+    timeout: float = 45  # secs
+
+    pinged: int = field(init=False, default=0)
+    reaped: int = field(init=False, default=0)
+    _handle: Optional[TimerHandle] = field(init=False, default=None)
+
+    def start(self):
+        if self._handle is None:
+            self._handle = timer.call_later(self.interval, self._beat)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _beat(self):
+        self._handle = timer.call_later(self.interval, self._beat)
+
+        now = monotonic()
+        ping = Message(MessageType.ping, None)
+        frames: dict[Codec, str | bytes] = {}
+        idle = []
+
+        for session in self.registry:
+            quiet_for = now - session.last_seen
+            if quiet_for >= self.timeout:
+                idle.append(session)
+
+            elif quiet_for >= self.interval:
+                frame = frames.get(session.codec)
+                if frame is None:
+                    frame = frames[session.codec] = session.codec.encode(ping)
+                session.enqueue(frame, coalesce_key=MessageType.ping)
+                self.pinged += 1
+
+        # the handlers unregister them once their connection is closed
+        for session in idle:
+            session.disconnect()
+        self.reaped += len(idle)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pinged": self.pinged,
+            "reaped": self.reaped,
+        }
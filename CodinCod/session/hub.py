@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+__all__ = ("Hub", )
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Hashable, Iterable, Optional
+
+from .codec import Codec
+from .message import Message
+
+if TYPE_CHECKING:
+    from .session import Session
+
+
+@dataclass
+class Hub:
+    """
+    Topic based publish/subscribe for sessions, e.g. one topic per game room.
+    Every message is encoded once per codec and queued on all subscribers,
+    their writers send it; publishing never waits on a client.
+    """
+    published: int = field(init=False, default=0)
+    rejected: int = field(init=False, default=0)
+
+    _topics: defaultdict[Hashable, set[Session]] = field(init=False, default_factory=lambda: defaultdict(set))
+    _subscriptions: defaultdict[Session, set[Hashable]] = field(init=False, default_factory=lambda: defaultdict(set))
+
+    def subscribe(self, topic: Hashable, session: Session):
+        self._topics[topic].add(session)
+        self._subscriptions[session].add(topic)
+
+    def unsubscribe(self, topic: Hashable, session: Session):
+        self._discard(self._topics, topic, session)
+        self._discard(self._subscriptions, session, topic)
+
+    def unsubscribe_all(self, session: Session):
+        for topic in self._subscriptions.pop(session, ()):
+            self._discard(self._topics, topic, session)
+
+    @staticmethod
+    def _discard(index: defaultdict, key: Any, value: Any):
+        values = index.get(key)
+        if values is None:
+            return
+        values.discard(value)
+        if not values:
+            del index[key]
+
+    def subscribers(self, topic: Hashable) -> Iterable[Session]:
+        return self._topics.get(topic, ())
+
+    def publish(self, topic: Hashable, message: Message, coalesce_key: Optional[Hashable] = None) -> int:
+        """
+        Returns the number of sessions the message got queued on.
+        Messages with a coalesce key replace the still queued message with the same key,
+        for sessions using the COALESCE overflow policy.
+        """
+        sessions = self._topics.get(topic)
+        if not sessions:
+            return 0
+
+        self.published += 1
+        frames: dict[Codec, str | bytes] = {}
+
+        queued = 0
+        # copied, a rejected session may get unsubscribed while it's closing
+        for session in list(sessions):
+            frame = frames.get(session.codec)
+            if frame is None:
+                frame = frames[session.codec] = session.codec.encode(message)
+
+            if session.enqueue(frame, coalesce_key):
+                queued += 1
+            else:
+                self.rejected += 1
+
+        return queued
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "topics": len(self._topics),
+            "subscribed_sessions": len(self._subscriptions),
+            "published": self.published,
+            "rejected": self.rejected,
+        }
@@ -1,43 +1,177 @@
 from __future__ import annotations
 from ..game_room.game_room import GameRoom
 from dataclasses import dataclass, field
-from requests import request
 
 from sanic.server.websockets.impl import WebsocketImplProtocol
 from websockets.exceptions import ConnectionClosed
 from sanic.request import Request
 
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+
 import asyncio
-from typing import Final, ClassVar, Optional
-from . import Session, Message, MessageType, SessionException
+from typing import Any, Final, ClassVar, Optional
+from . import Session, Message, MessageType, SessionException, hub, session_registry, resumption
+from .expection import InvalidMessageException
 from ..user import User
 from ..game_room import GameRoom
+from ..chat import ChatRoom
 from ..exceptions import CodinCodException
 
+@dataclass(eq=False)
 class SessionManager(Session):
-    gameroom: Optional[GameRoom]
+    gameroom: Optional[GameRoom] = None
+    chat: Optional[ChatRoom] = None
     
     async def ws_handler(self):
+        session_registry.register(self)
+        self.start()
         try:
+            await self.send(Message(MessageType.session_started, {
+                "_id": str(self.id),
+                "resume_token": self.resume_token
+            }))
+
             while True:
                 try:
                     message = await self.recv()
                     await self.packet_handler(message)
                     
                 except CodinCodException as exception:
-                    # await self.send_error(exception.__class__.__name__, str(exception))
-                    raise NotImplementedError
+                    await self.send_error(exception.__class__.__name__, exception.msg)
 
-        except (ConnectionClosed, TimeoutError) as exception:
+        except ConnectionClosed as exception:
             # XXX: LOG ?
             pass
 
         finally:
+            self.leave_chat()
             if self.gameroom is not None:
-                self.gameroom.remove_session(self)
+                # the connection may come back, see resume_session
+                resumption.suspend(self, self.gameroom.id)
+                self.gameroom.remove_session(self, suspend=True)
+            hub.unsubscribe_all(self)
+            session_registry.unregister(self)
+            await self.stop()
+
+    async def send_error(self, name: str, msg: str):
+        await self.send(Message(MessageType.error, {"type": name, "msg": msg}))
 
     async def packet_handler(self, message: Message):
-        if message.type is MessageType.ping:
+        # the heartbeat only cares about the client being active, recv already noted it
+        if message.type is MessageType.ping or message.type is MessageType.pong:
             return
 
-        raise NotImplementedError
+        match message.type:
+            case MessageType.watch_game:
+                await self.watch_game(message.content)
+            case MessageType.resume_session:
+                await self.resume_session(message.content)
+            case MessageType.join_chat:
+                await self.join_chat(message.content)
+            case MessageType.leave_chat:
+                self.leave_chat()
+            case MessageType.send_message:
+                self.in_chat().send(self.user, self._field(message, "text"))
+            case MessageType.edit_message:
+                self.in_chat().edit(self.user, self._message_id(message), self._field(message, "text"))
+            case MessageType.delete_message:
+                self.in_chat().delete(self.user, self._message_id(message))
+            case _:
+                raise InvalidMessageException(f"{message.type.value} messages aren't supported yet")
+
+    @staticmethod
+    def _field(message: Message, name: str) -> Any:
+        try:
+            return message.content[name]
+        except (KeyError, TypeError):
+            raise InvalidMessageException(f"{message.type.value}: {name} is missing")
+
+    @classmethod
+    def _message_id(cls, message: Message) -> ObjectId:
+        try:
+            return ObjectId(cls._field(message, "_id"))
+        except (TypeError, InvalidId):
+            raise InvalidMessageException(f"{message.type.value}: invalid message id")
+
+    def in_chat(self) -> ChatRoom:
+        if self.chat is None:
+            raise SessionException("Join a chat first")
+        return self.chat
+
+    async def join_chat(self, content: Any):
+        """
+        Joins the chat of a game room, the user doesn't have to watch the game.
+        The recent messages are sent first.
+        """
+        try:
+            game_id = ObjectId(content["id"])
+        except (KeyError, TypeError, InvalidId):
+            raise InvalidMessageException("join_chat: invalid game id")
+
+        # only checks the game exists, the chat isn't tied to the game room object
+        await GameRoom.get_by_id(game_id)
+
+        self.leave_chat()
+        self.chat = ChatRoom.get(game_id)
+        await self.chat.join(self)
+
+    def leave_chat(self):
+        if self.chat is not None:
+            self.chat.leave(self)
+            self.chat = None
+
+    async def watch_game(self, content: Any):
+        """
+        Subscribes the session to the events of a game room,
+        the user has to watch a game room before joining it.
+        Sends a snapshot of the game first, the events after it only describe what changed.
+        """
+        try:
+            game_id = ObjectId(content["id"])
+        except (KeyError, TypeError, InvalidId):
+            raise InvalidMessageException("watch_game: invalid game id")
+
+        game = await GameRoom.get_by_id(game_id)
+
+        if self.gameroom is not None:
+            self.gameroom.remove_session(self)
+
+        # queued before subscribing, no event can get ahead of the snapshot
+        game.flush_events()
+        self.enqueue(game.snapshot_frame(self.codec))
+
+        self.gameroom = game
+        game.add_session(self)
+
+    async def resume_session(self, content: Any):
+        """
+        Puts a reconnected client back into the game room its previous session was watching,
+        and sends it the events published since the last one it received.
+        """
+        try:
+            token = str(content["token"])
+            last_seq = int(content["last_seq"])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidMessageException("resume_session: a token and last_seq are needed")
+
+        room_id = resumption.resume(token, self.user.id)
+        if room_id is None:
+            raise SessionException("Can't resume: the session expired")
+
+        game = await GameRoom.get_by_id(room_id)
+
+        if self.gameroom is not None:
+            self.gameroom.remove_session(self)
+
+        # queued before subscribing, so newer events can't get ahead of them
+        game.flush_events()
+        missed = game.events.since(last_seq)
+        if missed is None:
+            self.enqueue(game.snapshot_frame(self.codec))
+        else:
+            for message in missed:
+                await self.send(message)
+
+        self.gameroom = game
+        game.add_session(self)
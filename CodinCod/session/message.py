@@ -1,37 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-import json
+from typing import Optional
 
 from . import MessageType
-from .expection import InvalidMessageException
 
 
 @dataclass
 class Message:
+    """
+    Encoded and decoded by the session's codec.
+    """
     type: MessageType
     content: object
-    
-    def dumps(self):
-        return json.dumps({
-            "type": self.type.value,
-            "content": self.content
-        })
-
-    @classmethod
-    def loads(cls, message: str | bytes):
-        try:
-            message_dict = json.loads(message)
-        except ValueError:
-            message_dict = None
-
-        if not type(message_dict) is dict or\
-            message_dict.keys() != {"type", "content"} or\
-            message_dict["type"] not in MessageType:
-            raise InvalidMessageException("Recieved an Invalid message {message}")
-
-        return Message(
-            MessageType[message_dict["type"]],
-            message_dict["content"])
-
-        
\ No newline at end of file
+    # position in the event log of a game room, None for messages that aren't logged
+    seq: Optional[int] = None
@@ -6,17 +6,27 @@ class MessageType(Enum):
     # Special messages
     ping = "ping"
     error = "error"
+    # the session id and the token to resume it after a reconnect
+    session_started = "session_started"
+    # several events at once, content is the list of messages
+    batch = "batch"
     
     # Notifications
     game_invitation = "game_invitation"
 
     # In-game events
     user_joined_game = "user_joined_game"
+    user_left_game = "user_left_game"
+    game_state_changed = "game_state_changed"
+    # the whole game, sent when starting to watch it (or when resuming too late for the missed events)
+    game_snapshot = "game_snapshot"
     player_submitted = "submission_submitted"
     subimission_results = "subimission_results"
     game_results = "game_results"
 
     # Chat messages
+    # the recent messages, sent when joining the chat
+    chat_history = "chat_history"
     user_joined_chat = "user_joined_chat"
     user_left_chat = "user_left_chat"
     message_sent = "message_sent"
@@ -29,6 +39,9 @@ class MessageType(Enum):
     # Special messages
     pong = "pong"
     
+    # sent after reconnecting, with the token and the last seq received
+    resume_session = "resume_session"
+
     # In-game Events
     watch_game = "watch_game"
 
@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class OverflowPolicy(Enum):
+    # drops the oldest queued messages, the client misses them
+    DROP_OLDEST = 0
+    # messages sent with a coalesce key replace the queued one with the same key,
+    # a queue full of other messages disconnects the client
+    COALESCE = 1
+    # disconnects the client as soon as its queue is full
+    DISCONNECT = 2
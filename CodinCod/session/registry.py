@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+__all__ = ("SessionRegistry", )
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
+
+from bson.objectid import ObjectId
+
+if TYPE_CHECKING:
+    from .session import Session
+
+
+@dataclass
+class SessionRegistry:
+    """
+    Every connected session, indexed by id, by user and by game room.
+    Sessions are registered when they connect and unregistered when they close,
+    a session is in at most one game room at a time.
+    """
+    _by_id: dict[ObjectId, Session] = field(init=False, default_factory=dict)
+    _by_user: dict[ObjectId, set[Session]] = field(init=False, default_factory=dict)
+    # room id => user id => sessions
+    _by_room: dict[ObjectId, dict[ObjectId, set[Session]]] = field(init=False, default_factory=dict)
+    _room_of: dict[Session, ObjectId] = field(init=False, default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Session]:
+        return iter(self._by_id.values())
+
+    def register(self, session: Session):
+        self._by_id[session.id] = session
+        self._by_user.setdefault(session.user.id, set()).add(session)
+        session.user.acquire()
+
+    def unregister(self, session: Session):
+        if self._by_id.pop(session.id, None) is None:
+            return
+
+        self.leave_room(session)
+        self._discard(self._by_user, session.user.id, session)
+        session.user.release()
+
+    def join_room(self, session: Session, room_id: ObjectId):
+        self.leave_room(session)
+        self._room_of[session] = room_id
+        self._by_room.setdefault(room_id, {}).setdefault(session.user.id, set()).add(session)
+
+    def leave_room(self, session: Session) -> Optional[ObjectId]:
+        """
+        Returns the room the session was in.
+        """
+        room_id = self._room_of.pop(session, None)
+        if room_id is None:
+            return None
+
+        room = self._by_room[room_id]
+        self._discard(room, session.user.id, session)
+        if not room:
+            del self._by_room[room_id]
+
+        return room_id
+
+    @staticmethod
+    def _discard(index: dict[ObjectId, set[Session]], key: ObjectId, session: Session):
+        sessions = index.get(key)
+        if sessions is None:
+            return
+        sessions.discard(session)
+        if not sessions:
+            del index[key]
+
+    def get(self, session_id: ObjectId) -> Optional[Session]:
+        return self._by_id.get(session_id)
+
+    def of_user(self, user_id: ObjectId) -> Iterable[Session]:
+        return self._by_user.get(user_id, ())
+
+    def in_room(self, room_id: ObjectId) -> Iterator[Session]:
+        for sessions in self._by_room.get(room_id, {}).values():
+            yield from sessions
+
+    def of_user_in_room(self, room_id: ObjectId, user_id: ObjectId) -> Iterable[Session]:
+        return self._by_room.get(room_id, {}).get(user_id, ())
+
+    def is_online(self, user_id: ObjectId) -> bool:
+        return user_id in self._by_user
+
+    def room_of(self, session: Session) -> Optional[ObjectId]:
+        return self._room_of.get(session)
+
+    def room_user_count(self, room_id: ObjectId) -> int:
+        """
+        Users with at least one session in the room.
+        """
+        return len(self._by_room.get(room_id, ()))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sessions": len(self._by_id),
+            "users": len(self._by_user),
+            "rooms": len(self._by_room),
+        }
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+__all__ = ("Resumption", )
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+from bson.objectid import ObjectId
+
+from ..cache import LRUCache
+
+if TYPE_CHECKING:
+    from .session import Session
+
+
+@dataclass
+class Resumption:
+    """
+    Resume tokens of the sessions that lost their connection while watching a game room.
+    A client reconnecting with its token within grace_period gets back into the room.
+    Tokens are single use.
+    """
+    grace_period: float = 30  # secs
+    max_entries: int = 65536
+
+    resumed: int = field(init=False, default=0)
+    # resume token => user id, room id
+    _tokens: LRUCache[str, tuple[ObjectId, ObjectId]] = field(init=False)
+
+    def __post_init__(self):
+        self._tokens = LRUCache(max_entries=self.max_entries, ttl=self.grace_period)
+
+    def suspend(self, session: Session, room_id: ObjectId):
+        self._tokens.set(session.resume_token, (session.user.id, room_id))
+
+    def resume(self, token: str, user_id: ObjectId) -> Optional[ObjectId]:
+        """
+        Returns the room the session was watching, None if the token is unknown,
+        expired or belongs to another user.
+        """
+        suspended = self._tokens.get(token)
+        if suspended is None or suspended[0] != user_id:
+            return None
+
+        self._tokens.invalidate(token)
+        self.resumed += 1
+        return suspended[1]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "suspended": len(self._tokens),
+            "resumed": self.resumed,
+        }
@@ -1,4 +1,7 @@
 from __future__ import annotations
+from collections import OrderedDict
+from contextlib import suppress
+from itertools import count
 from dataclasses import dataclass, field
 
 from sanic.server.websockets.impl import WebsocketImplProtocol
@@ -9,31 +12,160 @@ from bson import ObjectId
 import json
 
 import asyncio
-from typing import Final, ClassVar, Optional, TypedDict
+import secrets
+from time import monotonic
+from typing import Any, Final, ClassVar, Hashable, Optional, TypedDict
 
 
 from . import Message, SessionException
+from .codec import Codec, JSON_CODEC
+from .overflow_policy import OverflowPolicy
 from ..user import User
+from ..environment_variables import load_dotenv
 
-@dataclass
-class Session:
-    timeout:    ClassVar[int] = 10  # secs
-    __sessions: ClassVar[list[Session]] = []
+environment: Final = load_dotenv()
+
+default_max_queue: Final = int(environment.get("SESSION_MAX_QUEUE") or 256)
+if default_max_queue < 1:
+    raise ValueError(f"SESSION_MAX_QUEUE: {default_max_queue}, a session has to queue at least one message")
+
+
+@dataclass(eq=False)
+class _Outgoing:
+    frame: str | bytes
+    coalesce_key: Optional[Hashable]
 
+
+@dataclass(eq=False)
+class Session:
+    """
+    Outgoing messages go through a bounded queue drained by the session's own writer task,
+    so a slow client only ever holds back its own messages.
+    What happens once the queue is full depends on the overflow policy.
+    """
     request: Request
     ws: WebsocketImplProtocol
-    user: User = field(init = False)
+    user: User
+    codec: Codec = JSON_CODEC
 
-    async def recv(self) -> Message:
-        message = await self.ws.recv(self.timeout)
-        if message is None:
-            raise TimeoutError
+    max_queue: int = default_max_queue
+    overflow_policy: OverflowPolicy = OverflowPolicy[environment.get("SESSION_OVERFLOW_POLICY") or "COALESCE"]
+
+    _id: ObjectId = field(init=False, default_factory=ObjectId)
+    resume_token: str = field(init=False, default_factory=lambda: secrets.token_urlsafe(16))
+    # monotonic time of the last message from the client, for the heartbeat
+    last_seen: float = field(init=False, default_factory=monotonic)
 
-        return Message.loads(message)
+    sent: int = field(init=False, default=0)
+    dropped: int = field(init=False, default=0)
+
+    # queued messages in order, by a running number so a superseded one is removed in O(1)
+    _queue: OrderedDict[int, _Outgoing] = field(init=False, default_factory=OrderedDict)
+    _numbers: count = field(init=False, default_factory=count)
+    # coalesce key => number of the queued message with that key
+    _coalesced: dict[Hashable, int] = field(init=False, default_factory=dict)
+    _ready: asyncio.Event = field(init=False, default_factory=asyncio.Event)
+    _writer: Optional[asyncio.Task] = field(init=False, default=None)
+    _closing: Optional[asyncio.Task] = field(init=False, default=None)
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        """
+        Starts the writer, has to be called from inside the running event loop.
+        """
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write())
+
+    async def stop(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._writer
+
+    async def recv(self) -> Message:
+        message = await self.ws.recv()
+        self.last_seen = monotonic()
+        return self.codec.decode(message)
 
     async def send(self, message: Message):
-        await self.ws.send(message.dumps())
+        self.enqueue(self.codec.encode(message))
+
+    def enqueue(self, frame: str | bytes, coalesce_key: Optional[Hashable] = None) -> bool:
+        """
+        Queues a message already encoded with the session's codec,
+        lets the hub encode a broadcast only once per codec.
+        Returns False if the message got rejected because the client is too slow.
+        """
+        if self._closing is not None:
+            return False
+
+        if coalesce_key is not None and self.overflow_policy is OverflowPolicy.COALESCE:
+            previous = self._coalesced.get(coalesce_key)
+            if previous is not None:
+                self._drop(previous)
+
+        if len(self._queue) >= self.max_queue:
+            if self.overflow_policy is not OverflowPolicy.DROP_OLDEST:
+                self.disconnect()
+                return False
+
+            self._drop(next(iter(self._queue)))
+
+        number = next(self._numbers)
+        self._queue[number] = _Outgoing(frame, coalesce_key)
+        if coalesce_key is not None:
+            self._coalesced[coalesce_key] = number
+
+        self._ready.set()
+        return True
+
+    def _drop(self, number: int):
+        self._forget(number, self._queue.pop(number))
+        self.dropped += 1
+
+    def _forget(self, number: int, outgoing: _Outgoing):
+        if outgoing.coalesce_key is not None and self._coalesced.get(outgoing.coalesce_key) == number:
+            del self._coalesced[outgoing.coalesce_key]
+
+    async def _write(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+
+                number, outgoing = self._queue.popitem(last=False)
+                self._forget(number, outgoing)
+
+                await self.ws.send(outgoing.frame)
+                self.sent += 1
+
+        except ConnectionClosed:
+            pass
+
+    def disconnect(self):
+        """
+        Closes the connection in the background, messages still queued are lost.
+        """
+        if self._closing is None:
+            self._closing = asyncio.create_task(self.close())
+
+    async def close(self):
+        await self.stop()
+        await self.ws.close()
 
-    def __del__(self):
-        self.__sessions.remove(self)
-        self.user.release()
+    def stats(self) -> dict[str, Any]:
+        return {
+            "_id": str(self.id),
+            "user_id": str(self.user.id),
+            "queued": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+        }
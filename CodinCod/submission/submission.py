@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Optional, cast, Final
+from typing import Any, ClassVar, Iterable, Optional, cast, Final
 from bson.objectid import ObjectId
 
-from ..piston import Language
+from ..environment_variables import load_dotenv
+from ..piston import Language, Priority
 from . import submissions_collection
 
 from ..puzzle import Puzzle
+from ..puzzle.validator import Validator
+
+
+environment: Final = load_dotenv()
 
 
 @dataclass
 class Submission:
+    # validators of a single submission running at the same time
+    max_concurrent_validators: ClassVar[int] = int(environment.get("SUBMISSION_MAX_CONCURRENT_VALIDATORS") or 4)
+    # validators running at the same time, shared by every submission
+    __validators_semaphore: ClassVar[asyncio.Semaphore] = asyncio.Semaphore(
+        int(environment.get("MAX_CONCURRENT_VALIDATORS") or 16))
+
     _id: ObjectId
     puzzle_id: ObjectId
     user_id: ObjectId
@@ -39,9 +51,9 @@ class Submission:
         return sum(self.validators_results) / len(self.validators_results)
 
     @classmethod
-    def create(cls, user_id: ObjectId, puzzle_id: ObjectId, language: Language, code: str) -> Optional[Submission]:
+    async def create(cls, user_id: ObjectId, puzzle_id: ObjectId, language: Language, code: str) -> Optional[Submission]:
         timestamp = datetime.now().isoformat()
-        result = submissions_collection.insert_one(
+        result = await submissions_collection.insert_one(
             {
                 "user_id": user_id,
                 "puzzle_id": puzzle_id,
@@ -50,19 +62,29 @@ class Submission:
                 "submitted_at": timestamp
             }
         )
-        submission = Submission.get_by_id(result.inserted_id)
+        submission = await Submission.get_by_id(result.inserted_id)
         return submission
 
     @classmethod
-    def get_by_id(cls, submission_id: ObjectId) -> Optional[Submission]:
-        return cls.get_from_db_by_id(submission_id)
+    async def get_by_id(cls, submission_id: ObjectId) -> Optional[Submission]:
+        return await cls.get_from_db_by_id(submission_id)
 
     @classmethod
-    def get_from_db_by_id(cls, submission_id: ObjectId) -> Optional[Submission]:
-        info = cast(Optional[dict], submissions_collection.find_one({"_id": submission_id}))
+    async def get_from_db_by_id(cls, submission_id: ObjectId) -> Optional[Submission]:
+        info = cast(Optional[dict], await submissions_collection.find_one({"_id": submission_id}))
         if info is None: return
         return cls.get_from_db_dict(info)
 
+    @classmethod
+    async def get_many(cls, submission_ids: Iterable[ObjectId]) -> dict[ObjectId, Submission]:
+        """
+        Finds several submissions with a single query.
+        Submissions that don't exist are left out.
+        """
+        cursor = submissions_collection.find({"_id": {"$in": list(submission_ids)}})
+        submissions = map(cls.get_from_db_dict, await cursor.to_list(None))
+        return {submission.id: submission for submission in submissions}
+
     @classmethod
     def get_from_db_dict(cls, info) -> Submission:
         return cls(
@@ -71,7 +93,9 @@ class Submission:
             ObjectId(info["user_id"]),
             info["code"],
             Language.get(info["language"]),
-            datetime.fromisoformat(info["submitted_at"])
+            datetime.fromisoformat(info["submitted_at"]),
+            info.get("validators_results", []),
+            info.get("execution_finished", False)
         )
 
     def as_dict(self) -> dict[str, Any]:
@@ -87,15 +111,66 @@ class Submission:
     def public_info(self) -> dict[str,Any]:
         return {
             "_id": str(self._id),
-            "puzzle_id": self.puzzle_id,
-            "user_id": self.user_id,
+            "puzzle_id": str(self.puzzle_id),
+            "user_id": str(self.user_id),
             "language": self.language.name,
-            "submitted_at": self.submitted_at
+            "submitted_at": self.submitted_at.isoformat()
         }
 
-    async def execute(self):
-        for validator in Puzzle.get_by_id(self.puzzle_id).validators:
-            success, _ = await validator.execute(self.code, self.language)
-            self.validators_results.append(success)
-
-        self.execution_finished = True
\ No newline at end of file
+    async def execute(self, fail_fast: bool = False, batched: bool = True):
+        """
+        Runs all validators of the puzzle, results are stored in validator order.
+        When batched, all validators are first run in a single Piston execution if the
+        language supports it; whatever the batch couldn't judge runs concurrently, one by one.
+        With fail_fast, the remaining validators are cancelled after the first failure
+        and count as failed.
+        """
+        validators = (await Puzzle.get_by_id(self.puzzle_id)).validators
+        results: list[Optional[bool]] = [None] * len(validators)
+
+        submission_semaphore = asyncio.Semaphore(self.max_concurrent_validators)
+
+        if batched:
+            # a batch takes a slot like any execution, or batches could fill the judging lane
+            async with submission_semaphore, self.__validators_semaphore:
+                batch_results = await Validator.execute_batch(
+                    validators, self.code, self.language, priority=Priority.JUDGING, user_id=self.user_id)
+
+            for index, result in enumerate(batch_results):
+                if result is not None:
+                    results[index] = result[0]
+
+        pending = [index for index, result in enumerate(results) if result is None]
+        if fail_fast and False in results:
+            pending = []
+
+        async def run_validator(index: int) -> bool:
+            async with submission_semaphore, self.__validators_semaphore:
+                success, _ = await validators[index].execute(
+                    self.code, self.language, priority=Priority.JUDGING, user_id=self.user_id)
+
+            results[index] = success
+            return success
+
+        tasks = [asyncio.create_task(run_validator(index)) for index in pending]
+        try:
+            if fail_fast:
+                for task in asyncio.as_completed(tasks):
+                    if not await task:
+                        break
+            else:
+                await asyncio.gather(*tasks)
+
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.validators_results = [bool(result) for result in results]
+        self.execution_finished = True
+
+        # stored, so the score survives the game room being loaded again from the db
+        await submissions_collection.update_one({"_id": self.id}, {"$set": {
+            "validators_results": self.validators_results,
+            "execution_finished": self.execution_finished
+        }})
@@ -0,0 +1,8 @@
+__all__ = ("Timer", "TimerHandle", "timer")
+
+from typing import Final
+
+from .timer import Timer, TimerHandle
+
+# shared by everything that needs deadlines, started with the app
+timer: Final = Timer()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+__all__ = ("Timer", "TimerHandle")
+
+import asyncio
+import heapq
+import inspect
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import count
+from time import monotonic
+from typing import Any, Callable, Optional
+
+
+@dataclass(eq=False)
+class TimerHandle:
+    deadline: float  # monotonic secs
+    callback: Callable[[], Any]
+    cancelled: bool = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+@dataclass
+class Timer:
+    """
+    Fires scheduled callbacks from a single task, instead of one sleeping task per deadline.
+    Deadlines are kept in a heap, cancelled handles are dropped once they reach the top.
+    Callbacks returning a coroutine get their own task, so a slow one doesn't hold back the others.
+    """
+    fired: int = field(init=False, default=0)
+
+    _heap: list[tuple[float, int, TimerHandle]] = field(init=False, default_factory=list)
+    _counter: count = field(init=False, default_factory=count)
+    _wakeup: asyncio.Event = field(init=False, default_factory=asyncio.Event)
+    _task: Optional[asyncio.Task] = field(init=False, default=None)
+    _running: set[asyncio.Task] = field(init=False, default_factory=set)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def call_later(self, delay: float, callback: Callable[[], Any]) -> TimerHandle:
+        """
+        delay in secs, callbacks may be scheduled before the timer is started.
+        """
+        handle = TimerHandle(monotonic() + delay, callback)
+
+        if not self._heap or handle.deadline < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (handle.deadline, next(self._counter), handle))
+
+        return handle
+
+    def call_at(self, when: datetime, callback: Callable[[], Any]) -> TimerHandle:
+        """
+        when is a naive local datetime, like the ones from datetime.now().
+        Deadlines in the past fire right away.
+        """
+        return self.call_later((when - datetime.now()).total_seconds(), callback)
+
+    def start(self):
+        """
+        Has to be called from inside the running event loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            now = monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, handle = heapq.heappop(self._heap)
+                if not handle.cancelled:
+                    self._fire(handle)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    def _fire(self, handle: TimerHandle):
+        self.fired += 1
+        loop = asyncio.get_running_loop()
+
+        try:
+            result = handle.callback()
+        except Exception as exception:
+            loop.call_exception_handler({"message": "Timer callback failed", "exception": exception})
+            return
+
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._running.add(task)
+            task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            task.get_loop().call_exception_handler(
+                {"message": "Timer callback failed", "exception": task.exception(), "task": task})
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "scheduled": len(self._heap),
+            "running": len(self._running),
+            "fired": self.fired,
+        }
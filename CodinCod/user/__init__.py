@@ -1,5 +1,7 @@
-__all__ = ("User", "users_collection", "UserException")
+__all__ = ("User", "Token", "password_hasher", "users_collection", "tokens_collection", "UserException")
 
-from .collection import users_collection
+from .collection import users_collection, tokens_collection
 from .exception import UserException
-from .user import User
\ No newline at end of file
+from .token import Token
+from .password import password_hasher
+from .user import User
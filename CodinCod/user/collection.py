@@ -1,7 +1,11 @@
-import pymongo
 from pymongo.collation import Collation, CollationStrength
-from ..database import db_client
+from ..database import db_client, register_index
 
 users_collection = db_client.get_collection("USERS") 
-users_collection.create_index("nickname", unique=True, collation=Collation(locale="en_US", strength=CollationStrength.SECONDARY))
-users_collection.create_index("email",    unique=True, collation=Collation(locale="en_US", strength=CollationStrength.SECONDARY))
\ No newline at end of file
+register_index(users_collection, "nickname", unique=True, collation=Collation(locale="en_US", strength=CollationStrength.SECONDARY))
+register_index(users_collection, "email",    unique=True, collation=Collation(locale="en_US", strength=CollationStrength.SECONDARY))
+
+tokens_collection = db_client.get_collection("TOKENS")
+register_index(tokens_collection, "user_id")
+# mongo deletes the tokens once they expire
+register_index(tokens_collection, "expires_at", expireAfterSeconds=0)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+__all__ = ("PasswordHasher", "password_hasher")
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Final, Optional
+
+from bcrypt import gensalt, hashpw, checkpw
+
+from .exception import UserAuthException
+from ..environment_variables import load_dotenv
+
+environment: Final = load_dotenv()
+
+
+# module level functions, the pool pickles them by name
+def _hash(password: bytes, rounds: int) -> bytes:
+    return hashpw(password, gensalt(rounds))
+
+
+def _verify(password: bytes, hashed: bytes) -> bool:
+    return checkpw(password, hashed)
+
+
+@dataclass
+class PasswordHasher:
+    """
+    Runs bcrypt in a small process pool, so hashing never blocks the event loop.
+    At most max_pending hashes are running or waiting at once,
+    anything beyond that is rejected right away instead of piling up behind them.
+    """
+    rounds: int = 12
+    max_workers: int = 2
+    max_pending: int = 32
+
+    pending: int = field(init=False, default=0)
+    rejected: int = field(init=False, default=0)
+    _pool: Optional[ProcessPoolExecutor] = field(init=False, default=None)
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def hash(self, password: str) -> bytes:
+        return await self._run(_hash, password.encode("utf-8"), self.rounds)
+
+    async def verify(self, password: str, hashed: bytes) -> bool:
+        """
+        The cost is read from the hash, so hashes made with other rounds still verify.
+        """
+        return await self._run(_verify, password.encode("utf-8"), hashed)
+
+    async def _run(self, function, *args) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise UserAuthException("Too many login attempts, try again later", status=429)
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, function, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher: Final = PasswordHasher(
+    rounds = int(environment.get("BCRYPT_ROUNDS") or 12),
+    max_workers = int(environment.get("BCRYPT_MAX_WORKERS") or 2),
+    max_pending = int(environment.get("BCRYPT_MAX_PENDING") or 32))
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+__all__ = ("Token", )
+
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from hashlib import sha256
+from typing import ClassVar, Final
+
+from bson.objectid import ObjectId
+
+from .collection import tokens_collection
+from .exception import UserAuthException
+from ..cache import LRUCache
+from ..environment_variables import load_dotenv
+
+environment: Final = load_dotenv()
+
+
+@dataclass(frozen=True)
+class Token:
+    """
+    Opaque session token.
+    The client gets a random string, the db only stores its sha256 digest,
+    so verifying a token is a single hash instead of a bcrypt check.
+    Verified tokens are cached for a short while, a revocation on another worker
+    takes at most cache_ttl to be noticed there.
+    """
+    lifetime: ClassVar[timedelta] = timedelta(days=int(environment.get("TOKEN_LIFETIME_DAYS") or 30))
+    __verified: ClassVar[LRUCache[str, Token]] = LRUCache(
+        max_entries = int(environment.get("TOKEN_CACHE_MAX_ENTRIES") or 4096),
+        ttl = float(environment.get("TOKEN_CACHE_TTL") or 60))
+
+    digest: str
+    user_id: ObjectId
+    expires_at: datetime
+
+    @staticmethod
+    def hash(token: str) -> str:
+        return sha256(token.encode("utf-8")).hexdigest()
+
+    @classmethod
+    async def issue(cls, user_id: ObjectId) -> str:
+        """
+        Stores a new token for the user and returns it, it can't be recovered from the db later on.
+        """
+        token = secrets.token_urlsafe(32)
+        await tokens_collection.insert_one(
+            {
+                "_id": cls.hash(token),
+                "user_id": user_id,
+                # naive utc, that's what mongo's ttl index compares against
+                "expires_at": datetime.utcnow() + cls.lifetime
+            }
+        )
+        return token
+
+    @classmethod
+    async def verify(cls, token: str) -> Token:
+        """
+        Raises a UserAuthException if the token is unknown, expired or revoked.
+        """
+        digest = cls.hash(token)
+        verified = cls.__verified.get(digest)
+
+        if verified is None:
+            info = await tokens_collection.find_one({"_id": digest})
+            if info is None:
+                raise UserAuthException("Invalid Token")
+
+            verified = cls(digest, info["user_id"], info["expires_at"])
+            cls.__verified.set(digest, verified)
+
+        # the ttl index only sweeps expired tokens about once a minute
+        if verified.expires_at <= datetime.utcnow():
+            cls.__verified.invalidate(digest)
+            raise UserAuthException("Token expired")
+
+        return verified
+
+    @classmethod
+    async def revoke(cls, token: str):
+        digest = cls.hash(token)
+        cls.__verified.invalidate(digest)
+        await tokens_collection.delete_one({"_id": digest})
+
+    @classmethod
+    async def revoke_all(cls, user_id: ObjectId):
+        """
+        Logs the user out everywhere, e.g. after a password change.
+        """
+        await tokens_collection.delete_many({"user_id": user_id})
+        # the cache isn't indexed by user, revoking everything is rare enough to drop it all
+        cls.__verified.clear()
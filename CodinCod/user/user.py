@@ -4,7 +4,7 @@ from __future__ import annotations
 __all__ = ("User", )
 
 import re
-from typing import Any, ClassVar, Optional, cast, Final
+from typing import Any, ClassVar, Iterable, Optional, cast, Final
 
 from sanic import text, json
 
@@ -15,12 +15,15 @@ from pymongo.errors import DuplicateKeyError
 
 from .profile import Profile
 from . import users_collection
+from .token import Token
+from .password import password_hasher
 from .exception import UserCreationException, UserFindException, UserAuthException
 
+from ..cache import LRUCache
 from ..exceptions import CodinCodException
+from ..environment_variables import load_dotenv
 
-from bcrypt import gensalt, hashpw, checkpw
-from base64 import b64encode, b64decode
+environment: Final = load_dotenv()
 
 
 # TODO: for version 0.2.0:
@@ -32,17 +35,20 @@ from base64 import b64encode, b64decode
 @dataclass(eq=False, kw_only=True)
 class User:
     __current_users: ClassVar[dict[ObjectId, User]] = {}
+    # users that recently authenticated, so auth_by_token doesn't hit the db on every request
+    __authenticated: ClassVar[LRUCache[ObjectId, User]] = LRUCache(
+        max_entries = int(environment.get("TOKEN_CACHE_MAX_ENTRIES") or 4096),
+        ttl = float(environment.get("TOKEN_CACHE_TTL") or 60))
 
     _id: ObjectId
     nickname: str
     email: str
     password: bytes
-    token: bytes
 
     __ref_count: int = field(init=False, default=0)
 
     @classmethod
-    def create(cls, nickname: str, email: str, password: str) -> tuple[User, str]:
+    async def create(cls, nickname: str, email: str, password: str) -> tuple[User, str]:
         """
         WIP! Didn't test this
         returns user, token
@@ -62,18 +68,16 @@ class User:
             _id=ObjectId(),
             nickname=nickname,
             email=email,
-            password=b"",
-            token=b"")
+            password=b"")
 
-        token = user.set_password(password)
+        await user.set_password(password)
 
         try:
-            result = users_collection.insert_one(
+            result = await users_collection.insert_one(
                 {
                     "nickname": user.nickname,
                     "email": user.email,
-                    "password": user.password,
-                    "token": user.token
+                    "password": user.password
                 }
             )
         except DuplicateKeyError as duplicate_error:
@@ -92,21 +96,21 @@ class User:
 
         user._id = result.inserted_id
 
-        return user, token
+        return user, await Token.issue(user.id)
 
     @classmethod
-    def get_by_id(cls, user_id: ObjectId) -> User:
+    async def get_by_id(cls, user_id: ObjectId) -> User:
         """
         Finds the user by it's id!
         """
         if user_id in cls.__current_users:
             return cls.__current_users[user_id]
 
-        return User.get_from_db_by_id(user_id)
+        return await User.get_from_db_by_id(user_id)
 
     @classmethod
-    def get_from_db_by_id(cls, user_id: ObjectId) -> User:
-        info = users_collection.find_one({"_id": user_id})
+    async def get_from_db_by_id(cls, user_id: ObjectId) -> User:
+        info = await users_collection.find_one({"_id": user_id})
         if info is None:
             raise UserFindException("Can't find user")
 
@@ -114,19 +118,49 @@ class User:
         return User.from_dict(info)
 
     @classmethod
-    def auth_by_token(cls, user_id: ObjectId, token: str) -> User:
+    async def get_many(cls, user_ids: Iterable[ObjectId]) -> dict[ObjectId, User]:
         """
-        Raises either UserFindException or UserAuthException if the authentication fails
+        Finds several users at once, with a single query for those that aren't in memory.
+        Raises a UserFindException if one of them doesn't exist.
         """
-        user = User.get_by_id(user_id)
+        users: dict[ObjectId, User] = {}
+        missing_ids: list[ObjectId] = []
+
+        for user_id in dict.fromkeys(user_ids):
+            if user_id in cls.__current_users:
+                users[user_id] = cls.__current_users[user_id]
+            else:
+                missing_ids.append(user_id)
+
+        if missing_ids:
+            cursor = users_collection.find({"_id": {"$in": missing_ids}})
+            for info in await cursor.to_list(None):
+                user = User.from_dict(info)
+                users[user.id] = user
+
+        if any(user_id not in users for user_id in missing_ids):
+            raise UserFindException("Can't find user")
+
+        return users
 
-        if not user.verify_token(token):
+    @classmethod
+    async def auth_by_token(cls, user_id: ObjectId, token: str) -> User:
+        """
+        Raises either UserFindException or UserAuthException if the authentication fails
+        """
+        verified = await Token.verify(token)
+        if verified.user_id != user_id:
             raise UserAuthException("Invalid Token")
-            
+
+        user = cls.__current_users.get(user_id) or cls.__authenticated.get(user_id)
+        if user is None:
+            user = await User.get_from_db_by_id(user_id)
+            cls.__authenticated.set(user_id, user)
+
         return user
 
     @classmethod
-    def get_list_by_nickname(cls, nicknameIncludes: str) -> list[User]:
+    async def get_list_by_nickname(cls, nicknameIncludes: str) -> list[User]:
         """
         Retrieves (currently max 5) users that include a certain string in their nickname from the database
         then those users are transformed into User objects
@@ -138,9 +172,9 @@ class User:
                 "$regex": nicknameIncludes, "$options": 'i'
             }
         }
-        users_information = list(users_collection.find(
+        users_information = await users_collection.find(
             pipeline
-        ).limit(5))
+        ).limit(5).to_list(5)
 
         users = []
         for user in users_information:
@@ -149,8 +183,8 @@ class User:
         return users
 
     @classmethod
-    def get_by_nickname(cls, nickname: str) -> User:
-        info = users_collection.find_one({"nickname": nickname})
+    async def get_by_nickname(cls, nickname: str) -> User:
+        info = await users_collection.find_one({"nickname": nickname})
 
         if info is None:
             raise UserFindException(f"User with nickname {nickname} couldn't be found")
@@ -158,8 +192,8 @@ class User:
         return User.from_dict(info)
 
     @classmethod
-    def get_by_email(cls, email: str) -> User:
-        info = users_collection.find_one({"email": email})
+    async def get_by_email(cls, email: str) -> User:
+        info = await users_collection.find_one({"email": email})
 
         if info is None:
             raise UserFindException(f"User with email {email} couldn't be found")
@@ -170,44 +204,33 @@ class User:
     def from_dict(cls, infos: dict) -> User:
         return cls(
             _id=ObjectId(infos["_id"]), nickname=infos["nickname"],
-            password=infos["password"], email=infos["email"], token=infos["token"])
+            password=infos["password"], email=infos["email"])
 
     @property
     def id(self):
         return self._id
 
-    def set_password(self, password: str) -> str:
-        """
-        returns a new token
-        """
-        password_utf8 = password.encode("utf-8")
-        self.password = hashpw(password_utf8, gensalt())
-        new_token = hashpw(password_utf8, gensalt())
-        self.token = hashpw(password_utf8, gensalt())
-        return b64encode(new_token).decode()
+    async def set_password(self, password: str):
+        self.password = await password_hasher.hash(password)
+
+    async def verify_password(self, password: str) -> bool:
+        return await password_hasher.verify(password, self.password)
 
-    def verify_password(self, password: str) -> tuple[bool, str]:
+    async def login(self, password: str) -> Optional[str]:
         """
-        returns (success, token)
+        returns a new token, None if the password is wrong
         """
-        if not checkpw(password.encode("utf-8"), self.password):
-            return False, ""
-
-        password_utf8 = password.encode("utf-8")
-        token = hashpw(password_utf8, gensalt())
-
-        return True, b64encode(token).decode()
+        if not await self.verify_password(password):
+            return None
 
-    def verify_token(self, token: str) -> bool:
-        return checkpw(b64decode(token), self.token)
+        return await Token.issue(self.id)
 
     def as_dict(self) -> dict[str, Any]:
         return {
             "_id": str(self.id),
             "nickname": self.nickname,
             "email": self.email,
-            "password": self.password,
-            "token": self.token
+            "password": self.password
         }
 
     def public_info(self) -> dict[str, Any]:
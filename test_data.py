@@ -1,9 +1,10 @@
+import asyncio
 import logging
 from bson.objectid import ObjectId
 from CodinCod.puzzle.validator_type import ValidatorType
 
 from CodinCod.user.user import User
-from CodinCod.database import db_client
+from CodinCod.database import db_client, create_indexes
 from CodinCod.puzzle.puzzle import Puzzle
 from CodinCod.puzzle.puzzle_type import PuzzleType
 from CodinCod.puzzle.validator import Validator
@@ -15,9 +16,9 @@ from CodinCod.puzzle.exception import PuzzleException
 
 # example users insert stuff, test data
 
-def create_user(nickname: str, email: str, password: str) -> tuple[User, str] | None:
+async def create_user(nickname: str, email: str, password: str) -> tuple[User, str] | None:
     try:
-        return User.create(
+        return await User.create(
             nickname,
             email,
             password
@@ -25,9 +26,9 @@ def create_user(nickname: str, email: str, password: str) -> tuple[User, str] |
     except UserCreationException as exception:
         logging.warning(str(exception))
 
-def create_puzzle(title: str, statement: str, constraints: str, validators: list[Validator], puzzle_types: list[PuzzleType], author_id: ObjectId) -> Puzzle | None:
+async def create_puzzle(title: str, statement: str, constraints: str, validators: list[Validator], puzzle_types: list[PuzzleType], author_id: ObjectId) -> Puzzle | None:
     try:
-        return Puzzle.create(
+        return await Puzzle.create(
             title = title,
             statement = statement,
             constraints = constraints,
@@ -39,47 +40,53 @@ def create_puzzle(title: str, statement: str, constraints: str, validators: list
         logging.warning(str(exception))   
 
 
-create_user(
-    "Gorn10",
-    "Gorn10@dings.com",
-    "password"
-)
-
-puzzle_author = User.get_by_nickname("Gorn10")
-assert puzzle_author is not None
-
-create_user(
-    "Hydrazer",
-    "hydrazer@dings.com",
-    "password"
-)
-
-create_user(
-    "jutyve",
-    "jutyve@dings.com",
-    "password"
-)
-
-create_user(
-    "murat",
-    "murat@dings.com",
-    "password"
-)
-
-# example puzzle insert stuff, test data
-create_puzzle(
-    title = "FizzBuzz",
-    statement = "Print numbers from 1 to N, but if the number is divisible by F, print \"Fizz\", and if the number is divisible by B print \"Buzz\". If it is divisible by both print \"FizzBuzz\".",
-    constraints = "N lines",
-    validators = [
-        Validator(type = ValidatorType.TESTCASE, input = "7 2 3",
-                  output = "1\nFizz\nBuzz\nFizz\n5\nFizzBuzz\n7"),
-        Validator(type = ValidatorType.TESTCASE, input="3 1 1",
-                  output = "FizzBuzz\nFizzBuzz\nFizzBuzz"),
-        Validator(type = ValidatorType.TESTCASE, input = "10 11 12",
-                  output = "1\n2\n3\n4\n5\n6\n7\n8\n9\n10"),
-    ],
-    puzzle_types =[ PuzzleType.SHORTEST,
-                  PuzzleType.FASTEST, PuzzleType.REVERSE],
-    author_id = ObjectId(puzzle_author.id)
-)
+async def main():
+    await create_indexes()
+
+    await create_user(
+        "Gorn10",
+        "Gorn10@dings.com",
+        "password"
+    )
+
+    puzzle_author = await User.get_by_nickname("Gorn10")
+    assert puzzle_author is not None
+
+    await create_user(
+        "Hydrazer",
+        "hydrazer@dings.com",
+        "password"
+    )
+
+    await create_user(
+        "jutyve",
+        "jutyve@dings.com",
+        "password"
+    )
+
+    await create_user(
+        "murat",
+        "murat@dings.com",
+        "password"
+    )
+
+    # example puzzle insert stuff, test data
+    await create_puzzle(
+        title = "FizzBuzz",
+        statement = "Print numbers from 1 to N, but if the number is divisible by F, print \"Fizz\", and if the number is divisible by B print \"Buzz\". If it is divisible by both print \"FizzBuzz\".",
+        constraints = "N lines",
+        validators = [
+            Validator(type = ValidatorType.TESTCASE, input = "7 2 3",
+                      output = "1\nFizz\nBuzz\nFizz\n5\nFizzBuzz\n7"),
+            Validator(type = ValidatorType.TESTCASE, input="3 1 1",
+                      output = "FizzBuzz\nFizzBuzz\nFizzBuzz"),
+            Validator(type = ValidatorType.TESTCASE, input = "10 11 12",
+                      output = "1\n2\n3\n4\n5\n6\n7\n8\n9\n10"),
+        ],
+        puzzle_types =[ PuzzleType.SHORTEST,
+                      PuzzleType.FASTEST, PuzzleType.REVERSE],
+        author_id = ObjectId(puzzle_author.id)
+    )
+
+
+asyncio.run(main())